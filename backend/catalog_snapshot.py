@@ -0,0 +1,250 @@
+"""Building catalog snapshot shared by every worker on a host.
+
+One worker serialises the catalog into a file (list body, per-building
+bodies with a slug index, coordinate arrays) and publishes it with an atomic
+rename. Workers mmap the file read-only and switch to a new generation when
+the file's inode changes, so the catalog is held once per host regardless of
+the number of workers.
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.database.base import SessionLocal
+from backend.database.models.building import Building
+from backend.database.models.schema import BuildingBase
+from backend.utils.catalog import add_catalog_listener, bump_catalog_version
+from backend.utils.geo_utils import extract_point
+from backend.utils.host_files import host_path, lock_file, unlock_file
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"NCS1"
+# magic, generation, built_at
+HEADER = struct.Struct("<4sQd")
+# offset, length
+SECTION = struct.Struct("<QQ")
+SECTIONS = ("list_body", "buildings", "slug_index", "slugs", "lat", "lng")
+
+
+def _compact(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _render(building: dict) -> dict:
+    """Shape a building the way the routes' BuildingBase response model does"""
+    return BuildingBase.model_validate(building).model_dump(mode="json")
+
+
+def serialise_catalog(db: Session) -> Dict[str, bytes]:
+    """Render the catalog exactly as the list and detail routes would"""
+    rows = db.query(
+        Building.id, Building.slug, Building.name, Building.department,
+        Building.description, Building.image, Building.image_data.isnot(None),
+        Building.facilities, Building.coordinates, Building.footprint, Building.version
+    ).all()
+
+    list_items = []
+    buildings = bytearray()
+    slug_index = {}
+    slugs: List[str] = []
+    lats: List[float] = []
+    lngs: List[float] = []
+
+    for (building_id, slug, name, department, description, image, has_image,
+         facilities, coordinates, footprint, version) in rows:
+        list_items.append(_render({
+            "id": building_id,
+            "slug": slug,
+            "name": name,
+            "department": department,
+            "description": description,
+            "image": f"/api/buildings/image/{image}" if has_image else None,
+            "facilities": facilities,
+            "coordinates": coordinates if coordinates else {}
+        }))
+
+        body = _compact(_render({
+            "id": building_id,
+            "slug": slug,
+            "name": name,
+            "department": department,
+            "description": description,
+            "image": f"api/buildings/image/{image}" if has_image else None,
+            "facilities": facilities,
+            "coordinates": coordinates if coordinates else {},
+            "footprint": footprint,
+            "version": version
+        }))
+        slug_index[slug] = [len(buildings), len(body)]
+        buildings += body
+
+        point = extract_point(coordinates)
+        if point is not None:
+            slugs.append(slug)
+            lats.append(point[0])
+            lngs.append(point[1])
+
+    return {
+        "list_body": _compact(list_items),
+        "buildings": bytes(buildings),
+        "slug_index": _compact(slug_index),
+        "slugs": _compact(slugs),
+        "lat": np.radians(np.asarray(lats, dtype=np.float64)).tobytes(),
+        "lng": np.radians(np.asarray(lngs, dtype=np.float64)).tobytes(),
+    }
+
+
+class SnapshotView:
+    """One mapped generation of the snapshot; never changes once built"""
+
+    def __init__(self, mapped: mmap.mmap):
+        magic, self.generation, self.built_at = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a catalog snapshot")
+
+        buffer = memoryview(mapped)
+        sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = SECTION.unpack_from(mapped, HEADER.size + i * SECTION.size)
+            sections[name] = buffer[offset:offset + length]
+
+        self._mapped = mapped
+        self.list_body = sections["list_body"]
+        self._buildings = sections["buildings"]
+        self._slug_index = json.loads(bytes(sections["slug_index"]))
+        self.slugs: List[str] = json.loads(bytes(sections["slugs"]))
+        # Zero-copy views onto the shared pages
+        self.lat = np.frombuffer(sections["lat"], dtype=np.float64)
+        self.lng = np.frombuffer(sections["lng"], dtype=np.float64)
+
+    def building(self, slug: str) -> Optional[bytes]:
+        entry = self._slug_index.get(slug)
+        if entry is None:
+            return None
+        offset, length = entry
+        return bytes(self._buildings[offset:offset + length])
+
+
+class CatalogSnapshot:
+    def __init__(self, path: str):
+        self.path = host_path(path)
+        self.view: Optional[SnapshotView] = None
+        self._inode = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def refresh(self, published_here: bool = False) -> bool:
+        """Attach to the newest published generation; True if it changed"""
+        if not self.enabled:
+            return False
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            if self.view is None:
+                return False
+            # Withdrawn after a failed publish: read from the database until the next one
+            self.view = None
+            self._inode = None
+            bump_catalog_version(notify=False)
+            return True
+        if inode == self._inode:
+            return False
+
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = SnapshotView(mapped)
+
+        # Single assignment, so readers see either the old or the new generation
+        self.view = view
+        self._inode = inode
+        if not published_here:
+            # Another worker published this; drop locally derived caches
+            bump_catalog_version(notify=False)
+        logger.debug(f"Attached catalog snapshot generation {view.generation}")
+        return True
+
+    def publish(self, db: Session):
+        """Serialise the catalog and atomically replace the published snapshot"""
+        if not self.enabled:
+            return
+
+        # Serialise publishers across workers so the last writer saw the last commit
+        with open(f"{self.path}.lock", "a+b") as lock:
+            lock_file(lock)
+            try:
+                generation = self._published_generation() + 1
+                sections = serialise_catalog(db)
+
+                header_size = HEADER.size + SECTION.size * len(SECTIONS)
+                table = bytearray()
+                offset = header_size
+                for name in SECTIONS:
+                    table += SECTION.pack(offset, len(sections[name]))
+                    offset += len(sections[name])
+
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(HEADER.pack(MAGIC, generation, time.time()))
+                    f.write(table)
+                    for name in SECTIONS:
+                        f.write(sections[name])
+                os.replace(tmp_path, self.path)
+            finally:
+                unlock_file(lock)
+
+        # Our own catalog version was already bumped by the change being published
+        self.refresh(published_here=True)
+        logger.info(f"Published catalog snapshot generation {generation}")
+
+    def withdraw(self):
+        """Remove the published snapshot so no worker keeps serving a stale one"""
+        if not self.enabled:
+            return
+        with open(f"{self.path}.lock", "a+b") as lock:
+            lock_file(lock)
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            finally:
+                unlock_file(lock)
+        self.view = None
+        self._inode = None
+        logger.warning("Withdrew catalog snapshot; reads fall back to the database")
+
+    def _published_generation(self) -> int:
+        try:
+            with open(self.path, "rb") as f:
+                magic, generation, _ = HEADER.unpack(f.read(HEADER.size))
+            return generation if magic == MAGIC else 0
+        except (FileNotFoundError, struct.error):
+            return 0
+
+
+snapshot = CatalogSnapshot(settings.CATALOG_SNAPSHOT_PATH)
+
+
+def publish_snapshot():
+    """Rebuild the snapshot from the database with a short-lived session"""
+    db = SessionLocal()
+    try:
+        snapshot.publish(db)
+    except Exception:
+        # The old snapshot no longer matches the database
+        snapshot.withdraw()
+        raise
+    finally:
+        db.close()
+
+
+# Rebuild after every mutation made by this worker
+add_catalog_listener(lambda version, changes: publish_snapshot())
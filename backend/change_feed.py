@@ -0,0 +1,272 @@
+"""Building change events for Server-Sent Events listeners.
+
+Every mutation is appended as one JSON line to a log file shared by the
+workers on a host, under a lock, with an id one higher than the last line.
+Each worker with listeners tails the log into a bounded replay buffer, so
+event ids are the same in every worker and a client can resume with
+Last-Event-ID whichever worker it reconnects to. Idle listeners all wait on
+one future per worker and cost nothing until an event arrives.
+"""
+import asyncio
+import bisect
+import itertools
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+from backend.core.config import settings
+from backend.utils.catalog import CatalogChange, add_catalog_listener
+from backend.utils.host_files import CAN_LOCK, host_path, lock_file, unlock_file
+
+logger = logging.getLogger(__name__)
+
+# The log is rewritten with only the replayable tail once it grows past this
+MAX_LOG_BYTES = 1024 * 1024
+
+
+class ChangeFeed:
+    def __init__(self, path: Optional[str], replay: int = 1000, poll_interval: float = 0.5):
+        self.path = host_path(path)
+        self.poll_interval = poll_interval
+        # (id, event name, JSON data), oldest first
+        self._events: deque = deque(maxlen=replay)
+        self._ids: deque = deque(maxlen=replay)
+        self._last_id = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Future] = None
+        self._poll_now: Optional[asyncio.Event] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._listeners = 0
+        self._offset = 0
+        self._inode = None
+        # Ids handed out when there is no shared log; next() on it is atomic,
+        # so concurrent publishers from request threads never share an id
+        self._local_ids = itertools.count(1)
+
+    @property
+    def latest_id(self) -> int:
+        return self._last_id
+
+    @property
+    def listeners(self) -> int:
+        return self._listeners
+
+    def publish(self, changes: Iterable[CatalogChange]):
+        """Record changes; safe to call from any thread"""
+        now = time.time()
+        records = [
+            {
+                "event": change.kind,
+                "data": {
+                    "slug": change.slug,
+                    "previous_slug": change.previous_slug,
+                    "image_changed": change.image_changed,
+                    "time": now,
+                }
+            }
+            for change in changes
+        ]
+        if not records:
+            return
+
+        if self.path:
+            self._append(records)
+            self._call_in_loop(self._wake_poller)
+        else:
+            for record in records:
+                record["id"] = next(self._local_ids)
+            self._call_in_loop(self._add, records)
+
+    def _append(self, records: List[dict]):
+        log = self._open_locked()
+        with log:
+            try:
+                last_id = self._last_logged_id(log)
+                lines = []
+                for record in records:
+                    last_id += 1
+                    record["id"] = last_id
+                    lines.append(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+                log.seek(0, os.SEEK_END)
+                log.write(b"".join(lines))
+                log.flush()
+                if log.tell() > MAX_LOG_BYTES:
+                    self._compact(log)
+            finally:
+                unlock_file(log)
+
+    def _open_locked(self):
+        """Open the log holding its lock, making sure it was not compacted while we waited"""
+        while True:
+            log = open(self.path, "a+b")
+            if not CAN_LOCK:
+                return log
+            lock_file(log)
+            try:
+                if os.fstat(log.fileno()).st_ino == os.stat(self.path).st_ino:
+                    return log
+            except FileNotFoundError:
+                pass
+            log.close()
+
+    @staticmethod
+    def _last_logged_id(log) -> int:
+        size = log.seek(0, os.SEEK_END)
+        log.seek(max(0, size - 8192))
+        tail = log.read().rstrip(b"\n").rsplit(b"\n", 1)[-1]
+        try:
+            return json.loads(tail)["id"] if tail else 0
+        except (ValueError, KeyError):
+            return 0
+
+    def _compact(self, log):
+        """Keep only the replayable tail; readers notice the new inode and skip ids they have"""
+        log.seek(0)
+        lines = log.read().splitlines(keepends=True)[-self._events.maxlen:]
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(lines))
+        os.replace(tmp_path, self.path)
+
+    def _call_in_loop(self, callback, *args):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            if not self.path:
+                # Nobody is listening yet; still keep the events for replay
+                callback(*args)
+            return
+        try:
+            if asyncio.get_running_loop() is loop:
+                callback(*args)
+                return
+        except RuntimeError:
+            pass
+        loop.call_soon_threadsafe(callback, *args)
+
+    def _wake_poller(self):
+        if self._poll_now is not None:
+            self._poll_now.set()
+
+    def _add(self, records: List[dict]):
+        added = False
+        for record in records:
+            if record["id"] <= self._last_id:
+                continue
+            if record["id"] != self._last_id + 1:
+                # Some events were compacted away before this worker read them
+                self._events.clear()
+                self._ids.clear()
+            data = json.dumps(record["data"], separators=(",", ":"))
+            self._events.append((record["id"], record["event"], data))
+            self._ids.append(record["id"])
+            self._last_id = record["id"]
+            added = True
+        if added and self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+            self._changed = None
+
+    def _read_log(self):
+        """Pick up lines appended to the log since the last read"""
+        try:
+            log = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with log:
+            stat = os.fstat(log.fileno())
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                self._inode = stat.st_ino
+                self._offset = 0
+            resumed = self._offset > 0
+            records = self._read_from(log, stat.st_size)
+            if resumed and records and records[0]["id"] != self._last_id + 1:
+                # Compacted into a file that reused the inode; start over
+                self._offset = 0
+                records = self._read_from(log, stat.st_size)
+
+        if records:
+            last_id = self._last_id
+            if records[-1]["id"] < last_id:
+                # The log restarted (e.g. after a reboot); listeners get a reset
+                self._events.clear()
+                self._ids.clear()
+                self._last_id = 0
+            self._add(records)
+
+    def _read_from(self, log, size: int) -> List[dict]:
+        log.seek(self._offset)
+        chunk = log.read(size - self._offset)
+        complete = chunk.rfind(b"\n") + 1
+        self._offset += complete
+        records = []
+        for line in chunk[:complete].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                if records:
+                    logger.warning("Skipped unreadable change feed record")
+                else:
+                    # A cut first line means the offset is stale; the caller re-reads
+                    records.append({"id": -1})
+        return records
+
+    async def _poll(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._poll_now.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._poll_now.clear()
+            try:
+                self._read_log()
+            except OSError as e:
+                logger.error(f"Could not read change feed log: {e}")
+
+    def _attach(self):
+        """Bind to the running loop and start tailing the log"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._changed = None
+            self._poll_now = asyncio.Event()
+            self._poller = None
+        if self.path and (self._poller is None or self._poller.done()):
+            self._read_log()
+            self._poller = loop.create_task(self._poll())
+
+    def since(self, last_id: int) -> Optional[List[Tuple[int, str, str]]]:
+        """Events after last_id, or None if some of them are no longer buffered"""
+        if last_id > self._last_id:
+            return None
+        if last_id == self._last_id:
+            return []
+        start = bisect.bisect_right(self._ids, last_id)
+        if start == 0 and self._ids and self._ids[0] != last_id + 1:
+            return None
+        return [self._events[i] for i in range(start, len(self._events))]
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait until a new event is buffered; False on timeout"""
+        if self._changed is None:
+            self._changed = self._loop.create_future()
+        # asyncio.wait does not cancel the shared future when this waiter times out
+        done, _ = await asyncio.wait({self._changed}, timeout=timeout)
+        return bool(done)
+
+    def subscribe(self):
+        self._attach()
+        self._listeners += 1
+
+    def unsubscribe(self):
+        self._listeners -= 1
+        if self._listeners == 0 and self._poller is not None:
+            # Stop tailing until someone listens again
+            self._poller.cancel()
+            self._poller = None
+
+
+feed = ChangeFeed(settings.CHANGE_FEED_PATH, replay=settings.CHANGE_FEED_REPLAY)
+
+# Every mutation made by this worker goes into the feed
+add_catalog_listener(lambda version, changes: feed.publish(changes))
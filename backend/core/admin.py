@@ -0,0 +1,20 @@
+import hmac
+from typing import Optional
+from fastapi import Header, HTTPException
+from backend.core.config import settings
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Constant-time check against ADMIN_TOKEN; always False when none is configured"""
+    if settings.ADMIN_TOKEN is None or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.get_secret_value().encode())
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency guarding admin endpoints"""
+    if settings.ADMIN_TOKEN is None:
+        # Admin endpoints do not exist unless a token is configured
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -15,6 +15,46 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
 
+    # Logging settings
+    LOG_LEVEL: Optional[str] = None  # defaults to DEBUG when DEBUG is set, else INFO
+    LOG_FILE: Optional[str] = "app.log"
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    LOG_JSON: bool = True
+    # Fraction of routine access records kept; errors and slow requests are always kept
+    ACCESS_LOG_SAMPLE_RATE: float = 0.1
+    ACCESS_LOG_SLOW_MS: float = 1000
+
+    # Catalog snapshot shared by all workers on this host (empty disables it)
+    CATALOG_SNAPSHOT_PATH: str = "/dev/shm/navigation-catalog.snap"
+    # Building change events shared by all workers (empty keeps them per worker)
+    CHANGE_FEED_PATH: str = "/dev/shm/navigation-changes.log"
+    # Events kept for clients resuming with Last-Event-ID
+    CHANGE_FEED_REPLAY: int = 1000
+    # Seconds between keep-alive comments on idle event streams
+    CHANGE_FEED_KEEPALIVE: float = 15
+
+    # Rate limiting: token bucket per client, requests cost 1-50 tokens by route
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CAPACITY: float = 200
+    RATE_LIMIT_REFILL_RATE: float = 20
+    # Share buckets between workers through Redis, e.g. redis://localhost:6379/0
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    # Take the client from X-Forwarded-For when behind proxies that append to it
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    # Number of trusted proxies in front of the app; the client is that many entries from the right
+    RATE_LIMIT_PROXY_HOPS: int = 1
+
+    # Token expected in X-Admin-Token for admin endpoints; unset disables them
+    ADMIN_TOKEN: Optional[SecretStr] = None
+    # Where sampling runs and per-request profiles are written
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_SECONDS: float = 300
+
+    # Offline bundle settings
+    OFFLINE_BUNDLE_DIR: str = "offline_bundles"
+    OFFLINE_BUNDLE_KEEP: int = 10
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -22,6 +62,16 @@ class Settings(BaseSettings):
         case_sensitive=True
     )
 
+    @field_validator('LOG_LEVEL')
+    def validate_log_level(cls, v: Optional[str]) -> Optional[str]:
+        """Validate log level setting"""
+        if v is None:
+            return v
+        allowed = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+        if v.upper() not in allowed:
+            raise ValueError(f'Log level must be one of: {", ".join(allowed)}')
+        return v.upper()
+
     @field_validator('ENVIRONMENT')
     def validate_environment(cls, v: str) -> str:
         """Validate environment setting"""
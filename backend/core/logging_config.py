@@ -0,0 +1,150 @@
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import time
+from typing import Optional
+
+# Request ID of the request being handled, attached to every log record
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Logger for one-line-per-request access records
+ACCESS_LOGGER = "navigation.access"
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Copy the current request ID onto records while still on the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class AccessSamplingFilter(logging.Filter):
+    """Keep a fraction of routine access records but every slow or failed one"""
+
+    def __init__(self, sample_rate: float, slow_ms: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.name != ACCESS_LOGGER:
+            return True
+        if getattr(record, "status", 0) >= 500 or getattr(record, "duration_ms", 0) >= self.slow_ms:
+            return True
+        return random.random() < self.sample_rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                    + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Formatted on the calling thread by DroppingQueueHandler.prepare
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the writer lags"""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge args into the message but keep the traceback apart from it.
+
+        The stock prepare folds the traceback into the message, which would
+        leave the JSON formatter's exc_info field always empty.
+        """
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: int, log_file: Optional[str], max_bytes: int, backup_count: int,
+                  json_logs: bool, access_sample_rate: float, access_slow_ms: float,
+                  queue_size: int = 10000):
+    """Route all logging through a queue drained by a background writer thread"""
+    global _listener
+    stop_logging()
+
+    if json_logs:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s')
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    # Filters run on the calling thread, where the request context is still set
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(AccessSamplingFilter(access_sample_rate, access_slow_ms))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    # uvicorn installs its own synchronous handlers before the app is imported.
+    # Its server messages go through the queue too; its access log is replaced
+    # by the sampled records written by the request middleware.
+    for name in ("uvicorn", "uvicorn.error"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    uvicorn_access = logging.getLogger("uvicorn.access")
+    uvicorn_access.handlers.clear()
+    uvicorn_access.propagate = False
+    uvicorn_access.disabled = True
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -42,6 +42,13 @@ def init_db_extensions():
             conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp";'))
             conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm;'))
             
+            # Columns and indexes added after the tables were first created
+            conn.execute(text('ALTER TABLE buildings ADD COLUMN IF NOT EXISTS footprint JSON;'))
+            conn.execute(text('ALTER TABLE buildings ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;'))
+            conn.execute(text(
+                'CREATE INDEX IF NOT EXISTS ix_buildings_facilities ON buildings USING gin (facilities);'
+            ))
+            
             # Create full-text search function
             conn.execute(text("""
                 CREATE OR REPLACE FUNCTION tsvector_update_trigger() RETURNS trigger AS $$
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, ARRAY, JSON, LargeBinary
+from sqlalchemy import Column, Integer, String, Float, ARRAY, JSON, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
 from backend.database.base import Base
 
 class Building(Base):
     __tablename__ = "buildings"
+    __table_args__ = (
+        # GIN index so facility containment queries (facilities @> ARRAY[...]) avoid a table scan
+        Index("ix_buildings_facilities", "facilities", postgresql_using="gin"),
+    )
 
     id = Column(String, primary_key=True)
     slug = Column(String, unique=True, nullable=False, index=True)
@@ -15,4 +19,8 @@ class Building(Base):
     mime_type = Column(String, nullable=True)
     facilities = Column(ARRAY(String), nullable=True)
     coordinates = Column(JSON, nullable=True)
+    # GeoJSON Polygon coordinates: [[[lng, lat], ...], <holes>...]
+    footprint = Column(JSON, nullable=True)
+    # Incremented on every change; bulk updates only apply to the version they read
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
\ No newline at end of file
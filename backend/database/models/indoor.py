@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, UniqueConstraint
+from backend.database.base import Base
+
+class Floor(Base):
+    __tablename__ = "floors"
+    __table_args__ = (UniqueConstraint("building_id", "level"),)
+
+    id = Column(Integer, primary_key=True)
+    building_id = Column(String, ForeignKey("buildings.id", ondelete="CASCADE"), nullable=False, index=True)
+    # 0 is the ground floor, negative levels are basements
+    level = Column(Integer, nullable=False)
+    name = Column(String, nullable=True)
+
+class IndoorNode(Base):
+    """A room, corridor junction, entrance, or stair/lift landing inside a building"""
+    __tablename__ = "indoor_nodes"
+    __table_args__ = (UniqueConstraint("building_id", "code"),)
+
+    id = Column(Integer, primary_key=True)
+    building_id = Column(String, ForeignKey("buildings.id", ondelete="CASCADE"), nullable=False, index=True)
+    floor_id = Column(Integer, ForeignKey("floors.id", ondelete="CASCADE"), nullable=False)
+    # Room number or other label, unique within the building
+    code = Column(String, nullable=False)
+    name = Column(String, nullable=True)
+    # room, corridor, entrance, stairs or lift; entrances join the outdoor network
+    kind = Column(String, nullable=False, default="room")
+    lat = Column(Float, nullable=False)
+    lng = Column(Float, nullable=False)
+
+class IndoorConnector(Base):
+    """A walkable link between two indoor nodes: corridor, door, stairs or lift"""
+    __tablename__ = "indoor_connectors"
+
+    id = Column(Integer, primary_key=True)
+    building_id = Column(String, ForeignKey("buildings.id", ondelete="CASCADE"), nullable=False, index=True)
+    from_node_id = Column(Integer, ForeignKey("indoor_nodes.id", ondelete="CASCADE"), nullable=False)
+    to_node_id = Column(Integer, ForeignKey("indoor_nodes.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False, default="corridor")
+    # Walking length; computed from the node positions and levels when missing
+    length_m = Column(Float, nullable=True)
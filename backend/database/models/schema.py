@@ -1,6 +1,19 @@
 import json
 from pydantic import BaseModel, validator
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Union
+
+def check_footprint(v):
+    """Validate GeoJSON Polygon coordinates: an outer ring followed by optional holes"""
+    if v is not None:
+        if not v:
+            raise ValueError('Footprint must contain at least one ring')
+        for ring in v:
+            if len(ring) < 3:
+                raise ValueError('Footprint rings need at least 3 positions')
+            for position in ring:
+                if len(position) != 2 or not all(isinstance(c, (int, float)) for c in position):
+                    raise ValueError('Footprint positions must be [lng, lat] number pairs')
+    return v
 
 class BuildingBase(BaseModel):
     id: str
@@ -13,6 +26,8 @@ class BuildingBase(BaseModel):
     mime_type: Optional[str] = None
     facilities: Optional[List[str]] = None
     coordinates: Optional[Dict] = None
+    footprint: Optional[List[List[List[float]]]] = None
+    version: Optional[int] = None
 
     @validator('coordinates')
     def validate_coordinates(cls, v):
@@ -29,6 +44,11 @@ class BuildingCreate(BaseModel):
     description: Optional[str] = None
     facilities: Optional[List[str]] = None
     coordinates: Optional[Dict[str, float]] = None
+    footprint: Optional[List[List[List[float]]]] = None
+
+    @validator('footprint')
+    def validate_footprint(cls, v):
+        return check_footprint(v)
 
     @validator('facilities')
     def validate_facilities(cls, v):
@@ -61,6 +81,7 @@ class BuildingUpdate(BaseModel):
     mime_type: Optional[str] = None
     facilities: Optional[List[str]] = None
     coordinates: Optional[Dict[str, float]] = None
+    footprint: Optional[List[List[List[float]]]] = None
 
     @validator('coordinates')
     def validate_coordinates(cls, v):
@@ -73,6 +94,10 @@ class BuildingUpdate(BaseModel):
                 raise ValueError('Coordinates values must be numbers')
         return v
 
+    @validator('footprint')
+    def validate_footprint(cls, v):
+        return check_footprint(v)
+
     @validator('facilities')
     def validate_facilities(cls, v):
         if v is not None:
@@ -87,3 +112,144 @@ class BuildingUpdate(BaseModel):
 
 class Building(BuildingBase):
     pass
+
+class BuildingPatch(BaseModel):
+    """One item of a bulk update; only the fields that are sent are changed"""
+    slug: str
+    version: int
+    name: Optional[str] = None
+    department: Optional[str] = None
+    description: Optional[str] = None
+    facilities: Optional[List[str]] = None
+    coordinates: Optional[Dict[str, float]] = None
+    footprint: Optional[List[List[List[float]]]] = None
+
+    @validator('name', 'department', 'description')
+    def validate_required(cls, v):
+        if v is None:
+            raise ValueError('Field cannot be null')
+        return v
+
+    @validator('coordinates')
+    def validate_coordinates(cls, v):
+        if v is not None:
+            if 'lat' not in v or 'lng' not in v:
+                raise ValueError('Coordinates must contain lat and lng')
+        return v
+
+    @validator('footprint')
+    def validate_footprint(cls, v):
+        return check_footprint(v)
+
+class BuildingBulkPatch(BaseModel):
+    updates: List[BuildingPatch]
+    # Roll back every item if any of them conflicts
+    atomic: bool = False
+
+    @validator('updates')
+    def validate_updates(cls, v):
+        if not v:
+            raise ValueError('At least one update is required')
+        if len(v) > 500:
+            raise ValueError('At most 500 updates are allowed')
+        if len({item.slug for item in v}) != len(v):
+            raise ValueError('Each building may appear only once')
+        return v
+
+class BuildingSearchResult(BaseModel):
+    total: int
+    buildings: List[BuildingBase]
+    facets: Dict[str, Dict[str, int]]
+
+class MatrixPoint(BaseModel):
+    lat: float
+    lng: float
+
+class DistanceMatrixRequest(BaseModel):
+    origins: List[Union[str, MatrixPoint]]
+    destinations: Optional[List[Union[str, MatrixPoint]]] = None
+
+    @validator('origins', 'destinations')
+    def validate_size(cls, v):
+        if v is not None:
+            if not v:
+                raise ValueError('At least one location is required')
+            if len(v) > 1000:
+                raise ValueError('At most 1000 locations are allowed')
+        return v
+
+INDOOR_NODE_KINDS = ("room", "corridor", "entrance", "stairs", "lift")
+INDOOR_CONNECTOR_KINDS = ("corridor", "door", "stairs", "lift")
+
+class IndoorFloorData(BaseModel):
+    level: int
+    name: Optional[str] = None
+
+class IndoorNodeData(BaseModel):
+    code: str
+    name: Optional[str] = None
+    kind: str = "room"
+    level: int
+    lat: float
+    lng: float
+
+    @validator('kind')
+    def validate_kind(cls, v):
+        if v not in INDOOR_NODE_KINDS:
+            raise ValueError(f"Kind must be one of: {', '.join(INDOOR_NODE_KINDS)}")
+        return v
+
+class IndoorConnectorData(BaseModel):
+    from_code: str
+    to_code: str
+    kind: str = "corridor"
+    length_m: Optional[float] = None
+
+    @validator('kind')
+    def validate_kind(cls, v):
+        if v not in INDOOR_CONNECTOR_KINDS:
+            raise ValueError(f"Kind must be one of: {', '.join(INDOOR_CONNECTOR_KINDS)}")
+        return v
+
+    @validator('length_m')
+    def validate_length(cls, v):
+        if v is not None and v < 0:
+            raise ValueError('Length cannot be negative')
+        return v
+
+class IndoorPlan(BaseModel):
+    """Floors, rooms and connectors of one building, replaced as a whole"""
+    floors: List[IndoorFloorData]
+    nodes: List[IndoorNodeData]
+    connectors: List[IndoorConnectorData] = []
+
+    @validator('floors')
+    def validate_floors(cls, v):
+        if len({floor.level for floor in v}) != len(v):
+            raise ValueError('Each level may appear only once')
+        return v
+
+    @validator('nodes')
+    def validate_nodes(cls, v, values):
+        if 'floors' not in values:
+            return v
+        levels = {floor.level for floor in values['floors']}
+        if len({node.code for node in v}) != len(v):
+            raise ValueError('Node codes must be unique')
+        for node in v:
+            if node.level not in levels:
+                raise ValueError(f"Node {node.code} is on level {node.level}, which has no floor")
+        if v and not any(node.kind == 'entrance' for node in v):
+            raise ValueError('At least one entrance is required to reach the building')
+        return v
+
+    @validator('connectors')
+    def validate_connectors(cls, v, values):
+        if 'nodes' not in values:
+            return v
+        codes = {node.code for node in values['nodes']}
+        for connector in v:
+            for code in (connector.from_code, connector.to_code):
+                if code not in codes:
+                    raise ValueError(f"Connector refers to unknown node {code}")
+        return v
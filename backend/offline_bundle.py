@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+import msgpack
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.database.base import SessionLocal
+from backend.database.models.building import Building
+from backend.utils.binary_delta import make_delta
+from backend.utils.geo_utils import CoordinateTable
+from backend.utils.image_utils import make_thumbnail
+from backend.utils.routing import WalkGraph
+
+logger = logging.getLogger(__name__)
+
+# Bump when the bundle layout changes incompatibly
+BUNDLE_FORMAT = 1
+
+
+def collect_bundle(db: Session) -> dict:
+    """Gather everything a client needs offline, in a deterministic order"""
+    buildings = []
+    thumbnails = {}
+    footprints = {}
+    names = {}
+
+    for building in db.query(Building).order_by(Building.slug).yield_per(50):
+        buildings.append({
+            "id": building.id,
+            "slug": building.slug,
+            "name": building.name,
+            "department": building.department,
+            "description": building.description,
+            "facilities": building.facilities or [],
+            "coordinates": building.coordinates or {},
+        })
+        names[building.slug] = building.name
+        if building.footprint:
+            footprints[building.slug] = building.footprint
+        if building.image_data:
+            try:
+                thumbnails[building.slug] = make_thumbnail(building.image_data)
+            except Exception as e:
+                logger.warning(f"Skipping thumbnail for {building.slug}: {e}")
+
+    table = CoordinateTable((b["slug"], b["coordinates"]) for b in buildings)
+    graph = WalkGraph(table, names)
+    edges = sorted(
+        (i, j, round(weight, 1))
+        for i, neighbours in enumerate(graph.adjacency)
+        for j, weight in neighbours.items()
+        if i < j
+    )
+
+    return {
+        "format": BUNDLE_FORMAT,
+        "buildings": buildings,
+        "thumbnails": thumbnails,
+        "footprints": footprints,
+        "walk_graph": {"nodes": table.slugs, "edges": [list(edge) for edge in edges]},
+    }
+
+
+def encode_bundle(content: dict) -> bytes:
+    return msgpack.packb(content, use_bin_type=True)
+
+
+class BundleStore:
+    """Versioned bundles and the deltas between consecutive versions on disk"""
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    def bundle_path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, f"bundle-{content_hash}.bin")
+
+    def delta_path(self, from_hash: str, to_hash: str) -> str:
+        return os.path.join(self.directory, f"delta-{from_hash}-{to_hash}.bin")
+
+    def versions(self) -> List[dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)["versions"]
+        except FileNotFoundError:
+            return []
+
+    def latest(self) -> Optional[dict]:
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def patch_chain(self, from_hash: str) -> Optional[List[dict]]:
+        """Deltas leading from a version to the latest, or None if it is unknown"""
+        versions = self.versions()
+        hashes = [v["hash"] for v in versions]
+        if from_hash not in hashes:
+            return None
+        # A hash can appear twice when content went back to an earlier state
+        start = len(hashes) - 1 - hashes[::-1].index(from_hash)
+        return [
+            {"from": versions[i - 1]["hash"], "to": versions[i]["hash"], "size": versions[i]["delta_size"]}
+            for i in range(start + 1, len(versions))
+        ]
+
+    def _write_atomic(self, path: str, data: bytes):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def publish(self, data: bytes) -> dict:
+        """Store a bundle as the newest version unless it matches the current one"""
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            versions = self.versions()
+            previous = versions[-1] if versions else None
+            if previous and previous["hash"] == content_hash:
+                return previous
+
+            self._write_atomic(self.bundle_path(content_hash), data)
+
+            delta_size = None
+            if previous:
+                with open(self.bundle_path(previous["hash"]), "rb") as f:
+                    delta = make_delta(f.read(), data)
+                self._write_atomic(self.delta_path(previous["hash"], content_hash), delta)
+                delta_size = len(delta)
+
+            entry = {
+                "version": previous["version"] + 1 if previous else 1,
+                "hash": content_hash,
+                "size": len(data),
+                "delta_size": delta_size,
+                "created_at": int(time.time()),
+            }
+            versions.append(entry)
+
+            # Drop the oldest versions; their clients fall back to a full download
+            dropped = versions[:-self.keep]
+            versions = versions[-self.keep:]
+            versions[0]["delta_size"] = None
+            # Files are named by content, so a kept version may still use a dropped one's files
+            kept_bundles = {v["hash"] for v in versions}
+            kept_deltas = {(a["hash"], b["hash"]) for a, b in zip(versions, versions[1:])}
+            for old, new in zip(dropped, dropped[1:] + versions[:1]):
+                if old["hash"] not in kept_bundles and os.path.exists(self.bundle_path(old["hash"])):
+                    os.remove(self.bundle_path(old["hash"]))
+                delta_path = self.delta_path(old["hash"], new["hash"])
+                if (old["hash"], new["hash"]) not in kept_deltas and os.path.exists(delta_path):
+                    os.remove(delta_path)
+
+            self._write_atomic(
+                self.manifest_path, json.dumps({"versions": versions}, indent=2).encode("utf-8")
+            )
+            return entry
+
+
+store = BundleStore(settings.OFFLINE_BUNDLE_DIR, settings.OFFLINE_BUNDLE_KEEP)
+
+
+def build_bundle(db: Session) -> dict:
+    """Build the offline bundle from the database and publish it"""
+    data = encode_bundle(collect_bundle(db))
+    entry = store.publish(data)
+    logger.info(f"Offline bundle version {entry['version']} ({entry['size']} bytes, {entry['hash'][:12]})")
+    return entry
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        print(json.dumps(build_bundle(db), indent=2))
+    finally:
+        db.close()
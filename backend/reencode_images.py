@@ -0,0 +1,176 @@
+"""Re-encode images stored in buildings.image_data.
+
+Rows are streamed in primary key order through a server-side cursor, encoded
+in a process pool and written back in one transaction per chunk. A row is
+only written if its version is unchanged since it was read, so images
+uploaded while the job runs are left alone. The last committed id is
+checkpointed so an interrupted run resumes where it stopped.
+
+    python -m backend.reencode_images --max-size 1600 --quality 80 --pause 0.5
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from sqlalchemy import update
+from backend.database.base import SessionLocal, engine
+from backend.database.models.building import Building
+from backend.utils.catalog import CatalogChange, bump_catalog_version
+from backend.utils.image_utils import reencode_image
+# Imported for their catalog listeners: workers see the new snapshot and feed events
+import backend.catalog_snapshot  # noqa: F401
+import backend.change_feed  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT = "reencode_images.checkpoint.json"
+
+
+def load_checkpoint(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        # Checkpoints from before rows could be skipped
+        state.setdefault("skipped", 0)
+        return state
+    except FileNotFoundError:
+        return {"last_id": None, "processed": 0, "updated": 0, "skipped": 0, "failed": 0, "saved_bytes": 0}
+
+
+def save_checkpoint(path: str, state: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _reencode_row(row: tuple, max_size: Optional[int], quality: int) -> tuple:
+    """Worker: return (id, new_data or None, mime_type, error)"""
+    building_id, image_data, mime_type, _ = row
+    try:
+        data, new_mime_type = reencode_image(image_data, mime_type, max_size=max_size, quality=quality)
+    except Exception as e:
+        return building_id, None, mime_type, str(e)
+
+    # Only keep the result if it actually saves space or fixes the MIME type
+    if len(data) >= len(image_data) and new_mime_type == mime_type:
+        return building_id, None, mime_type, None
+    return building_id, data, new_mime_type, None
+
+
+def run(chunk_size: int, workers: int, max_size: Optional[int], quality: int,
+        pause: float, checkpoint_path: str, dry_run: bool = False) -> dict:
+    state = load_checkpoint(checkpoint_path)
+    if state["last_id"] is not None:
+        logger.info(f"Resuming after id {state['last_id']!r}")
+
+    query = (
+        Building.__table__.select()
+        .with_only_columns(Building.id, Building.image_data, Building.mime_type, Building.version)
+        .where(Building.image_data.isnot(None))
+        .order_by(Building.id)
+    )
+    if state["last_id"] is not None:
+        query = query.where(Building.id > state["last_id"])
+
+    # Reads go through a dedicated connection with a server-side cursor so
+    # committing the writes never closes the stream
+    with engine.connect() as read_conn, ProcessPoolExecutor(max_workers=workers) as pool:
+        result = read_conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+
+        for rows in result.partitions(chunk_size):
+            rows = [tuple(row) for row in rows]
+            outcomes = list(pool.map(
+                _reencode_row, rows,
+                [max_size] * len(rows), [quality] * len(rows)
+            ))
+
+            changes = []
+            for (building_id, data, mime_type, error), (_, original, _, version) in zip(outcomes, rows):
+                if error:
+                    state["failed"] += 1
+                    logger.warning(f"Could not re-encode image of {building_id}: {error}")
+                elif data is not None:
+                    changes.append((building_id, version, data, mime_type, len(original) - len(data)))
+
+            written = []
+            if changes and not dry_run:
+                db = SessionLocal()
+                try:
+                    for building_id, version, data, mime_type, saved in changes:
+                        # Skipped if the building changed after it was read, e.g. a new upload
+                        slug = db.execute(
+                            update(Building)
+                            .where(Building.id == building_id, Building.version == version)
+                            .values(image_data=data, mime_type=mime_type, version=Building.version + 1)
+                            .returning(Building.slug)
+                        ).scalar()
+                        if slug is None:
+                            state["skipped"] += 1
+                            logger.info(f"Skipped {building_id}: changed while being re-encoded")
+                        else:
+                            written.append(slug)
+                            state["saved_bytes"] += saved
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+                finally:
+                    db.close()
+                if written:
+                    bump_catalog_version(*(CatalogChange("image_changed", slug, image_changed=True) for slug in written))
+            elif dry_run:
+                state["saved_bytes"] += sum(change[4] for change in changes)
+
+            state["processed"] += len(rows)
+            state["updated"] += len(changes) if dry_run else len(written)
+            state["last_id"] = rows[-1][0]
+            if not dry_run:
+                save_checkpoint(checkpoint_path, state)
+
+            logger.info(
+                f"Processed {state['processed']} images, updated {state['updated']}, "
+                f"skipped {state['skipped']}, failed {state['failed']}, saved {state['saved_bytes'] / 1048576:.1f} MiB"
+            )
+
+            # Throttle so live traffic keeps its share of the database and CPUs
+            if pause:
+                time.sleep(pause)
+
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encode building images stored in the database")
+    parser.add_argument("--chunk-size", type=int, default=20, help="Rows per batch and transaction")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Encoder processes")
+    parser.add_argument("--max-size", type=int, default=None, help="Downscale to this many pixels per side")
+    parser.add_argument("--quality", type=int, default=85, help="JPEG quality")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    state = run(
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        max_size=args.max_size,
+        quality=args.quality,
+        pause=args.pause,
+        checkpoint_path=args.checkpoint,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(state, indent=2))
+
+
+if __name__ == "__main__":
+    main()
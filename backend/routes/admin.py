@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+import os
+from backend.core.admin import require_admin
+from backend.core.config import settings
+from backend.utils.profiling import SamplingProfiler, list_profiles
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+sampler = SamplingProfiler(settings.PROFILE_DIR)
+
+
+@router.get("/admin/profiles")
+def get_profiles():
+    return {
+        "sampling": {"running": sampler.running, "current": sampler.current},
+        "profiles": list_profiles(settings.PROFILE_DIR)
+    }
+
+
+@router.post("/admin/profiler/start")
+def start_sampling(
+    seconds: float = Query(30, gt=0, le=settings.PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    include_idle: bool = Query(False, description="Keep samples of threads that are only waiting")
+):
+    """Sample this worker's stacks for a while and write a collapsed-stack file"""
+    try:
+        name = sampler.start(seconds, interval_ms / 1000, include_idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"file": name, "seconds": seconds, "pid": os.getpid()}
+
+
+@router.post("/admin/profiler/stop")
+def stop_sampling():
+    if not sampler.running:
+        raise HTTPException(status_code=409, detail="No sampling run in progress")
+    sampler.stop()
+    return {"file": sampler.current["file"], "samples": sampler.current.get("samples")}
+
+
+@router.get("/admin/profiles/{name}")
+def download_profile(name: str):
+    path = os.path.join(settings.PROFILE_DIR, os.path.basename(name))
+    if name != os.path.basename(name) or not name.endswith((".collapsed", ".pstats")) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
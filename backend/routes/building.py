@@ -1,18 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response, Body, Request
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response, Body, Request, Query
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+import asyncio
 import json
+import logging
 import base64
 import uuid
 import os
-from backend.database.base import get_db
+from urllib.parse import quote
+from backend.database.base import SessionLocal, get_db
 from backend.database.models.building import Building
-from backend.database.models.schema import BuildingBase, BuildingCreate, BuildingUpdate
+from backend.database.models.schema import BuildingBase, BuildingBulkPatch, BuildingCreate, BuildingUpdate, BuildingSearchResult, check_footprint
 from backend.seed_data import slugify
+from backend.catalog_snapshot import snapshot
+from backend.change_feed import feed
+from backend.core.config import settings
 from backend.utils.image_utils import process_uploaded_image, validate_image_file
-from typing import Optional, List, Dict
+from backend.utils.catalog import CatalogCache, CatalogChange, add_catalog_listener, bump_catalog_version, bump_catalog_version_async, get_catalog_version
+from backend.utils.facility_index import FacilityIndex
+from backend.utils.single_flight import SingleFlight
+from backend.utils.sprite_sheet import MAX_SPRITE_TILES, SpriteSheets
+from backend.utils.suggest_index import SuggestIndex
+from backend.utils.profiling import ProfiledRoute
+from typing import Optional, List, Dict, Tuple, Union
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# Identical concurrent reads share one in-flight database fetch
+_reads = SingleFlight()
+# Seconds a request waits on a shared fetch before giving up
+READ_TIMEOUT = 10.0
+
+# Facility/department inverted index, rebuilt after each catalog change
+_index_cache = CatalogCache()
+
+def get_facility_index(db: Session) -> FacilityIndex:
+    return _index_cache.get("facilities", lambda: FacilityIndex(
+        db.query(Building.slug, Building.department, Building.facilities).all()
+    ))
+
+# Autocomplete index, patched per building on local changes and rebuilt
+# when another worker changed the catalog
+_suggestions = SuggestIndex()
+_suggestions_version = -1
+
+def get_suggest_index(db: Session) -> SuggestIndex:
+    global _suggestions, _suggestions_version
+    version = get_catalog_version()
+    if _suggestions_version != version:
+        index = SuggestIndex()
+        index.popularity = _suggestions.popularity
+        index.build(db.query(Building.slug, Building.name, Building.department, Building.facilities).all())
+        _suggestions, _suggestions_version = index, version
+    return _suggestions
+
+def _update_suggestions(version: int, changes: Tuple[CatalogChange, ...]):
+    global _suggestions_version
+    # Only patch an index that was current right before these changes
+    if not changes or _suggestions_version != version - 1:
+        return
+
+    slugs = [change.slug for change in changes]
+    db = SessionLocal()
+    try:
+        rows = db.query(Building.slug, Building.name, Building.department, Building.facilities).filter(
+            Building.slug.in_(slugs)
+        ).all()
+    finally:
+        db.close()
+
+    found = {row.slug: row for row in rows}
+    for change in changes:
+        if change.previous_slug:
+            _suggestions.remove(change.previous_slug)
+        if change.slug in found:
+            _suggestions.upsert(*found[change.slug])
+        else:
+            _suggestions.remove(change.slug)
+    _suggestions_version = version
+
+add_catalog_listener(_update_suggestions)
 
 # Add a new endpoint for image upload
 
@@ -30,8 +102,10 @@ def delete_building_image(slug: str, db: Session = Depends(get_db)):
     # Update database record
     if building.image:
         building.image = None
+        building.version = Building.version + 1
         db.commit()
         db.refresh(building)
+        bump_catalog_version(CatalogChange("image_deleted", building.slug, image_changed=True))
         return {"message": "Image deleted successfully"}
     
     raise HTTPException(status_code=404, detail="No image found to delete")
@@ -57,13 +131,15 @@ async def create_building(
         department=building_data.department,
         description=building_data.description or "",
         facilities=building_data.facilities or [],
-        coordinates=building_data.coordinates or {"lat": 0, "lng": 0}
+        coordinates=building_data.coordinates or {"lat": 0, "lng": 0},
+        footprint=building_data.footprint
     )
     
     try:
         db.add(building)
         db.commit()
         db.refresh(building)
+        await bump_catalog_version_async(CatalogChange("created", building.slug))
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error saving building: {str(e)}")
@@ -76,7 +152,8 @@ async def create_building(
         "description": building.description,
         "image": None,
         "facilities": building.facilities,
-        "coordinates": building.coordinates
+        "coordinates": building.coordinates,
+        "footprint": building.footprint
     }
 
 @router.post("/buildings/{slug}/image", response_model=BuildingBase)
@@ -102,9 +179,11 @@ async def add_building_image(
         building.image = filename
         building.image_data = image_data
         building.mime_type = mime_type
+        building.version = Building.version + 1
         
         db.commit()
         db.refresh(building)
+        await bump_catalog_version_async(CatalogChange("image_changed", building.slug, image_changed=True))
         
     except Exception as e:
         db.rollback()
@@ -121,28 +200,213 @@ async def add_building_image(
         "coordinates": building.coordinates
     }
 
+def _fetch_image(filename: str) -> Optional[tuple]:
+    """Load (image_data, mime_type) for an image filename"""
+    db = SessionLocal()
+    try:
+        return db.query(Building.image_data, Building.mime_type).filter(
+            Building.image == filename, Building.image_data.isnot(None)
+        ).first()
+    finally:
+        db.close()
+
 @router.get("/buildings/image/{filename}")
-async def get_building_image(filename: str, db: Session = Depends(get_db)):
-    # Find building with this image filename
-    building = db.query(Building).filter(Building.image == filename).first()
+async def get_building_image(filename: str):
+    # Concurrent requests for the same image share one database fetch
+    try:
+        row = await _reads.do(("image", filename), lambda: _fetch_image(filename), timeout=READ_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out loading image")
     
-    if not building or not building.image_data:
+    if not row:
         raise HTTPException(status_code=404, detail="Image not found")
     
+    image_data, mime_type = row
+    return Response(
+        content=image_data,
+        media_type=mime_type or "image/png"
+    )
+
+# Thumbnail sprite sheets for list views; manifests are cached per catalog version,
+# bounded because the keys are whatever slug lists clients send
+_sprites = SpriteSheets()
+_sprite_cache = CatalogCache(max_entries=256)
+
+def _drop_thumbnails(version: int, changes: Tuple[CatalogChange, ...]):
+    for change in changes:
+        if change.image_changed:
+            _sprites.discard(change.slug)
+        if change.previous_slug:
+            _sprites.discard(change.previous_slug)
+
+add_catalog_listener(_drop_thumbnails)
+
+def _image_key(filename: str, version: int) -> str:
+    # Other workers never see the re-encode job's listener calls, and it keeps
+    # file names, so the row version tells them the image bytes changed
+    return f"{filename}@{version}"
+
+def _parse_slugs(slugs: str) -> List[str]:
+    requested = list(dict.fromkeys(slug.strip() for slug in slugs.split(",") if slug.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="At least one slug is required")
+    if len(requested) > MAX_SPRITE_TILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SPRITE_TILES} buildings per sprite sheet")
+    return requested
+
+def _sprite_manifest(db: Session, slugs: List[str]) -> dict:
+    """Compose (or reuse) the sheet for these buildings, reading only images not already thumbnailed"""
+    images = {
+        slug: _image_key(filename, version)
+        for slug, filename, version in db.query(Building.slug, Building.image, Building.version).filter(
+            Building.slug.in_(slugs), Building.image.isnot(None), Building.image_data.isnot(None)
+        )
+    }
+
+    stale = _sprites.stale(images)
+    if stale:
+        for slug, filename, version, image_data in db.query(
+            Building.slug, Building.image, Building.version, Building.image_data
+        ).filter(Building.slug.in_(stale), Building.image_data.isnot(None)):
+            try:
+                _sprites.add_thumbnail(slug, _image_key(filename, version), image_data)
+            except Exception as e:
+                logger.warning(f"Could not make thumbnail for {slug}: {e}")
+
+    manifest = _sprites.sheet(slugs, images)
+    manifest["missing"] = [slug for slug in slugs if slug not in manifest["tiles"]]
+    return manifest
+
+@router.get("/buildings/sprite")
+def get_thumbnail_sprite(
+    slugs: str = Query(..., description="Comma-separated building slugs, in display order"),
+    db: Session = Depends(get_db)
+):
+    """Offsets of each building's thumbnail in one sprite sheet image"""
+    requested = _parse_slugs(slugs)
+    manifest = _sprite_cache.get(("sprite", tuple(requested)), lambda: _sprite_manifest(db, requested))
+
+    url = None
+    if manifest["id"]:
+        url = f"/api/buildings/sprite/{manifest['id']}?slugs={quote(','.join(requested))}"
+    return {**manifest, "url": url, "tile_size": _sprites.tile_size}
+
+@router.get("/buildings/sprite/{sheet_id}")
+def get_thumbnail_sprite_image(
+    sheet_id: str,
+    request: Request,
+    slugs: str = Query(..., description="The slugs the sheet was made for"),
+    db: Session = Depends(get_db)
+):
+    etag = f'"{sheet_id}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    data = _sprites.image(sheet_id)
+    if data is None:
+        # Made by another worker or evicted; sheets are named by content, so rebuild it
+        manifest = _sprite_manifest(db, _parse_slugs(slugs))
+        if manifest["id"] != sheet_id:
+            raise HTTPException(status_code=404, detail="Sprite sheet is out of date")
+        data = _sprites.image(sheet_id)
+
     return Response(
-        content=building.image_data,
-        media_type=building.mime_type or "image/png"
+        content=data,
+        media_type="image/jpeg",
+        headers={"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
     )
 
-@router.get("/buildings", response_model=list[BuildingBase])
-def get_all_buildings(db: Session = Depends(get_db)):
-    buildings = db.query(Building).all()
+@router.get("/buildings/suggest")
+def suggest_buildings(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    return {"prefix": prefix, "suggestions": get_suggest_index(db).suggest(prefix, limit)}
+
+def _sse(event_id: int, event: str, data: str) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+@router.get("/buildings/changes")
+async def stream_building_changes(
+    request: Request,
+    last_event_id: Optional[int] = Query(None, ge=0, description="Resume after this event; Last-Event-ID takes precedence")
+):
+    """Server-Sent Events stream of building creates, updates and image changes"""
+    header = request.headers.get("last-event-id")
+    if header:
+        try:
+            last_event_id = int(header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID must be an integer")
+
+    async def events():
+        feed.subscribe()
+        try:
+            last_id = feed.latest_id if last_event_id is None else last_event_id
+            # An id with no data sets the resume point without dispatching an event
+            yield f"retry: 3000\nid: {last_id}\n\n"
+            while True:
+                pending = feed.since(last_id)
+                if pending is None:
+                    # Fell out of the replay buffer; the client has to reload the list
+                    last_id = feed.latest_id
+                    yield _sse(last_id, "reset", "{}")
+                elif pending:
+                    yield "".join(_sse(*event) for event in pending)
+                    last_id = pending[-1][0]
+                elif not await feed.wait(settings.CHANGE_FEED_KEEPALIVE):
+                    # Keeps proxies from closing the idle connection
+                    yield ": keepalive\n\n"
+        finally:
+            feed.unsubscribe()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Columns the list route returns; the image blob is only tested for NULL
+_LIST_COLUMNS = (
+    Building.id, Building.slug, Building.name, Building.department, Building.description,
+    Building.image, Building.image_data.isnot(None).label("has_image"),
+    Building.facilities, Building.coordinates
+)
+
+@router.get("/buildings", response_model=Union[list[BuildingBase], BuildingSearchResult])
+def get_all_buildings(
+    facility: Optional[List[str]] = Query(None, description="Only buildings with these facilities"),
+    department: Optional[List[str]] = Query(None, description="Only buildings in any of these departments"),
+    match: str = Query("all", pattern="^(all|any)$", description="Require all or any of the facilities"),
+    facets: bool = Query(False, description="Include facet counts without filtering"),
+    db: Session = Depends(get_db)
+):
+    filtered = bool(facility or department)
+    # Serve the plain list straight from the shared snapshot when available
+    view = snapshot.view
+    if view is not None and not (filtered or facets):
+        return Response(content=bytes(view.list_body), media_type="application/json")
+
+    slugs = None
+    if filtered or facets:
+        index = get_facility_index(db)
+        slugs = index.filter(facility, department, match_all=(match == "all"))
+
+    query = db.query(*_LIST_COLUMNS)
+    if filtered:
+        if not slugs:
+            buildings = []
+        else:
+            buildings = query.filter(Building.slug.in_(slugs)).all()
+    else:
+        buildings = query.all()
     
     result = []
     for building in buildings:
         # Generate image URL if image_data exists
         image_url = None
-        if building.image_data:
+        if building.has_image:
             image_url = f"/api/buildings/image/{building.image}"
         
         result.append({
@@ -156,18 +420,27 @@ def get_all_buildings(db: Session = Depends(get_db)):
             "coordinates": building.coordinates if building.coordinates else {}
         })
     
-    return result
+    if slugs is None:
+        return result
 
-@router.get("/{slug}", response_model=BuildingBase)
-def get_building_by_slug(slug: str, db: Session = Depends(get_db)):
-    building = db.query(Building).filter(Building.slug == slug).first()
-    
-    if not building:
-        raise HTTPException(status_code=404, detail="Building not found")
-    
+    return {
+        "total": len(result),
+        "buildings": result,
+        "facets": index.facets(slugs)
+    }
+
+# Columns the detail route returns, selected or RETURNed without the image blob
+_DETAIL_COLUMNS = (
+    Building.id, Building.slug, Building.name, Building.department,
+    Building.description, Building.image, Building.image_data.isnot(None).label("has_image"),
+    Building.facilities, Building.coordinates, Building.footprint, Building.version
+)
+
+def _detail_body(building) -> dict:
+    """Render a row of _DETAIL_COLUMNS as the detail route returns it"""
     # Generate image URL if image_data exists
     image_url = None
-    if building.image_data:
+    if building.has_image:
         image_url = f"api/buildings/image/{building.image}"
     
     return {
@@ -178,9 +451,69 @@ def get_building_by_slug(slug: str, db: Session = Depends(get_db)):
         "description": building.description,
         "image": image_url,
         "facilities": building.facilities,
-        "coordinates": building.coordinates if building.coordinates else {}
+        "coordinates": building.coordinates if building.coordinates else {},
+        "footprint": building.footprint,
+        "version": building.version
     }
 
+def _fetch_building(slug: str) -> Optional[dict]:
+    """Load a building as the detail route returns it, without its image blob"""
+    db = SessionLocal()
+    try:
+        building = db.query(*_DETAIL_COLUMNS).filter(Building.slug == slug).first()
+    finally:
+        db.close()
+    
+    if not building:
+        return None
+    
+    return _detail_body(building)
+
+def _update_returning(db: Session, slug: str, values: dict, expected_version: Optional[int] = None):
+    """Update one building and return its new detail row in the same round trip.
+
+    Returns None when the building does not exist or, if expected_version is
+    given, when it has changed since that version was read.
+    """
+    statement = update(Building).where(Building.slug == slug)
+    if expected_version is not None:
+        statement = statement.where(Building.version == expected_version)
+    statement = statement.values(**values, version=Building.version + 1).returning(*_DETAIL_COLUMNS)
+    return db.execute(statement.execution_options(synchronize_session=False)).first()
+
+def _current_version(db: Session, slug: str) -> Optional[int]:
+    return db.query(Building.version).filter(Building.slug == slug).scalar()
+
+def _unchanged_building(db: Session, slug: str, expected_version: Optional[int] = None):
+    """Detail row for an update with nothing to change, checked as _update_returning would be"""
+    building = db.query(*_DETAIL_COLUMNS).filter(Building.slug == slug).first()
+    if not building:
+        raise HTTPException(status_code=404, detail="Building not found")
+    if expected_version is not None and building.version != expected_version:
+        raise HTTPException(status_code=409, detail=f"Building was modified (current version {building.version})")
+    return building
+
+@router.get("/{slug}", response_model=BuildingBase)
+async def get_building_by_slug(slug: str):
+    view = snapshot.view
+    if view is not None:
+        body = view.building(slug)
+        if body is not None:
+            _suggestions.record_view(slug)
+            return Response(content=body, media_type="application/json")
+
+    try:
+        building = await _reads.do(("building", slug), lambda: _fetch_building(slug), timeout=READ_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out loading building")
+    
+    if not building:
+        raise HTTPException(status_code=404, detail="Building not found")
+
+    # Only real buildings count, so unknown slugs cannot grow or game the rankings
+    _suggestions.record_view(slug)
+    return building
+
 @router.put("/{slug}", response_model=BuildingBase)
 async def update_building(
     slug: str,
@@ -188,16 +521,15 @@ async def update_building(
     file: Optional[UploadFile] = File(None, description="Optional image file"),
     db: Session = Depends(get_db)
 ):
-    building = db.query(Building).filter(Building.slug == slug).first()
-    
-    if not building:
-        raise HTTPException(status_code=404, detail="Building not found")
-    
     # Get JSON data from request body
     try:
         data = await request.json()
     except Exception:
         data = {}
+    if not isinstance(data, dict):
+        data = {}
+    
+    values = {}
     
     # Process image if uploaded
     if file and file.filename:
@@ -210,22 +542,24 @@ async def update_building(
             filename, image_data, mime_type = await process_uploaded_image(file)
             
             # Update building with new image data
-            building.image = filename
-            building.image_data = image_data
-            building.mime_type = mime_type
+            values["image"] = filename
+            values["image_data"] = image_data
+            values["mime_type"] = mime_type
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
     
     # Update only the fields that were provided
-    if "name" in data:
-        building.name = data["name"]
-    if "department" in data:
-        building.department = data["department"]
-    if "description" in data:
-        building.description = data["description"]
+    for field in ("name", "department", "description"):
+        if field in data:
+            if not isinstance(data[field], str):
+                raise HTTPException(status_code=400, detail=f"{field.capitalize()} must be a string")
+            values[field] = data[field]
     if "facilities" in data:
-        building.facilities = data["facilities"]
+        facilities = data["facilities"]
+        if not isinstance(facilities, list) or not all(isinstance(f, str) for f in facilities):
+            raise HTTPException(status_code=400, detail="Facilities must be a list of strings")
+        values["facilities"] = facilities
     if "coordinates" in data:
         coords = data["coordinates"]
         if not isinstance(coords, dict):
@@ -234,24 +568,39 @@ async def update_building(
             raise HTTPException(status_code=400, detail="Coordinates must contain 'lat' and 'lng' keys")
         if not isinstance(coords["lat"], (int, float)) or not isinstance(coords["lng"], (int, float)):
             raise HTTPException(status_code=400, detail="Coordinates values must be numbers")
-        building.coordinates = coords
-    
-    db.commit()
-    db.refresh(building)
+        values["coordinates"] = coords
+    if "footprint" in data:
+        try:
+            values["footprint"] = check_footprint(data["footprint"])
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid footprint: {str(e)}")
     
-    # Generate image URL
-    image_url = f"api/buildings/image/{building.image}" if building.image_data else None
+    expected_version = data.get("version")
+    if expected_version is not None:
+        try:
+            # Via str so floats and booleans are rejected rather than truncated
+            expected_version = int(str(expected_version))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Version must be an integer")
+
+    if not values:
+        # Nothing to change: keep the version and send no change event
+        return _detail_body(_unchanged_building(db, slug, expected_version))
+
+    try:
+        building = _update_returning(db, slug, values, expected_version)
+        if not building:
+            _raise_update_failed(db, slug)
+        db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error updating building: {str(e)}")
+
+    await bump_catalog_version_async(CatalogChange("updated", slug, image_changed=bool(file and file.filename)))
     
-    return {
-        "id": building.id,
-        "slug": building.slug,
-        "name": building.name,
-        "department": building.department,
-        "description": building.description,
-        "image": image_url,
-        "facilities": building.facilities,
-        "coordinates": building.coordinates if building.coordinates else {}
-    }
+    return _detail_body(building)
 
 @router.put("/{slug}/data", response_model=BuildingBase)
 async def update_building_data(
@@ -261,41 +610,130 @@ async def update_building_data(
     description: Optional[str] = Body(None),
     facilities: Optional[List[str]] = Body(None),
     coordinates: Optional[Dict[str, float]] = Body(None),
+    footprint: Optional[List[List[List[float]]]] = Body(None),
+    version: Optional[int] = Body(None),
     db: Session = Depends(get_db)
 ):
-    # Find the building
-    building = db.query(Building).filter(Building.slug == slug).first()
-    if not building:
-        raise HTTPException(status_code=404, detail="Building not found")
-
     # Update only the provided fields
+    values = {}
     if name is not None:
-        building.name = name
+        values["name"] = name
         # Update slug if name changes
-        building.slug = slugify(name)
+        values["slug"] = slugify(name)
+        if values["slug"] != slug and db.query(Building.id).filter(Building.slug == values["slug"]).first():
+            raise HTTPException(status_code=400, detail="Building with this slug already exists")
     if department is not None:
-        building.department = department
+        values["department"] = department
     if description is not None:
-        building.description = description
+        values["description"] = description
     if facilities is not None:
-        building.facilities = facilities
+        values["facilities"] = facilities
     if coordinates is not None:
-        building.coordinates = coordinates
+        values["coordinates"] = coordinates
+    if footprint is not None:
+        try:
+            values["footprint"] = check_footprint(footprint)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid footprint: {str(e)}")
+
+    if not values:
+        return _detail_body(_unchanged_building(db, slug, version))
 
     try:
+        building = _update_returning(db, slug, values, version)
+        if not building:
+            _raise_update_failed(db, slug)
         db.commit()
-        db.refresh(building)
+    except IntegrityError:
+        # Another request took the new slug between the check and the update
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Building with this slug already exists")
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating building: {str(e)}")
 
+    await bump_catalog_version_async(CatalogChange("updated", building.slug, previous_slug=slug if building.slug != slug else None))
+    return _detail_body(building)
+
+def _raise_update_failed(db: Session, slug: str):
+    """Explain why _update_returning matched no row"""
+    current = _current_version(db, slug)
+    db.rollback()
+    if current is None:
+        raise HTTPException(status_code=404, detail="Building not found")
+    raise HTTPException(status_code=409, detail=f"Building was modified (current version {current})")
+
+@router.patch("/buildings")
+def patch_buildings(changes: BuildingBulkPatch, db: Session = Depends(get_db)):
+    """Apply partial updates to many buildings in one transaction.
+
+    Each item names the version it was read at. Items whose building has
+    changed since are reported as conflicts instead of being overwritten;
+    with `atomic` set, any conflict rolls the whole batch back. Items that
+    change nothing keep their version and send no change event.
+    """
+    results = []
+    # (new slug, slug before the update)
+    updated = []
+    try:
+        for item in changes.updates:
+            values = item.model_dump(exclude={"slug", "version"}, exclude_unset=True)
+            if "name" in values:
+                # Renames move the slug, as in PUT /{slug}/data
+                values["slug"] = slugify(values["name"])
+                if values["slug"] != item.slug and db.query(Building.id).filter(Building.slug == values["slug"]).first():
+                    results.append({"slug": item.slug, "status": "slug_taken", "new_slug": values["slug"]})
+                    continue
+
+            if values:
+                building = _update_returning(db, item.slug, values, item.version)
+                if building:
+                    updated.append((building.slug, item.slug))
+                    results.append({"slug": item.slug, "status": "updated", "building": _detail_body(building)})
+                    continue
+            else:
+                building = db.query(*_DETAIL_COLUMNS).filter(Building.slug == item.slug).first()
+                if building and building.version == item.version:
+                    results.append({"slug": item.slug, "status": "unchanged", "building": _detail_body(building)})
+                    continue
+
+            current = _current_version(db, item.slug)
+            if current is None:
+                results.append({"slug": item.slug, "status": "not_found"})
+            else:
+                results.append({"slug": item.slug, "status": "conflict", "current_version": current})
+
+        failed = [r for r in results if r["status"] not in ("updated", "unchanged")]
+        if changes.atomic and failed:
+            db.rollback()
+            raise HTTPException(status_code=409, detail={
+                "message": "Some buildings could not be updated; no changes were applied",
+                "results": failed
+            })
+        db.commit()
+    except IntegrityError:
+        # Another request took a new slug between the check and the update
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Building with this slug already exists")
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error updating buildings: {str(e)}")
+
+    if updated:
+        bump_catalog_version(*(
+            CatalogChange("updated", slug, previous_slug=previous if previous != slug else None)
+            for slug, previous in updated
+        ))
+
     return {
-        "id": building.id,
-        "slug": building.slug,
-        "name": building.name,
-        "department": building.department,
-        "description": building.description,
-        "image": f"api/buildings/image/{building.image}" if building.image else None,
-        "facilities": building.facilities,
-        "coordinates": building.coordinates
+        "updated": len(updated),
+        "unchanged": sum(1 for r in results if r["status"] == "unchanged"),
+        "conflicts": sum(1 for r in results if r["status"] == "conflict"),
+        "not_found": sum(1 for r in results if r["status"] == "not_found"),
+        "slug_taken": sum(1 for r in results if r["status"] == "slug_taken"),
+        "results": results
     }
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from backend.database.base import get_db
+from backend.database.models.building import Building
+from backend.database.models.indoor import Floor, IndoorConnector, IndoorNode
+from backend.database.models.schema import IndoorPlan
+from backend.utils.catalog import CatalogChange, bump_catalog_version
+from backend.utils.profiling import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("/buildings/{slug}/indoor")
+def get_indoor_plan(slug: str, db: Session = Depends(get_db)):
+    building = db.query(Building.id).filter(Building.slug == slug).first()
+    if not building:
+        raise HTTPException(status_code=404, detail="Building not found")
+
+    floors = db.query(Floor).filter(Floor.building_id == building.id).order_by(Floor.level).all()
+    levels = {floor.id: floor.level for floor in floors}
+    nodes = db.query(IndoorNode).filter(IndoorNode.building_id == building.id).order_by(IndoorNode.id).all()
+    codes = {node.id: node.code for node in nodes}
+    connectors = db.query(IndoorConnector).filter(
+        IndoorConnector.building_id == building.id
+    ).order_by(IndoorConnector.id).all()
+
+    return {
+        "slug": slug,
+        "floors": [{"level": floor.level, "name": floor.name} for floor in floors],
+        "nodes": [
+            {
+                "code": node.code,
+                "name": node.name,
+                "kind": node.kind,
+                "level": levels[node.floor_id],
+                "lat": node.lat,
+                "lng": node.lng
+            }
+            for node in nodes
+        ],
+        "connectors": [
+            {
+                "from_code": codes[connector.from_node_id],
+                "to_code": codes[connector.to_node_id],
+                "kind": connector.kind,
+                "length_m": connector.length_m
+            }
+            for connector in connectors
+        ]
+    }
+
+
+@router.put("/buildings/{slug}/indoor")
+def replace_indoor_plan(slug: str, plan: IndoorPlan, db: Session = Depends(get_db)):
+    """Replace a building's floors, rooms and connectors in one transaction"""
+    building = db.query(Building).filter(Building.slug == slug).first()
+    if not building:
+        raise HTTPException(status_code=404, detail="Building not found")
+
+    try:
+        # Children first; ondelete cascades are not relied on so this also works without FK support
+        db.query(IndoorConnector).filter(IndoorConnector.building_id == building.id).delete(synchronize_session=False)
+        db.query(IndoorNode).filter(IndoorNode.building_id == building.id).delete(synchronize_session=False)
+        db.query(Floor).filter(Floor.building_id == building.id).delete(synchronize_session=False)
+
+        floors = {
+            data.level: Floor(building_id=building.id, level=data.level, name=data.name)
+            for data in plan.floors
+        }
+        db.add_all(floors.values())
+        db.flush()
+
+        nodes = {
+            data.code: IndoorNode(
+                building_id=building.id, floor_id=floors[data.level].id, code=data.code,
+                name=data.name, kind=data.kind, lat=data.lat, lng=data.lng
+            )
+            for data in plan.nodes
+        }
+        db.add_all(nodes.values())
+        db.flush()
+
+        db.add_all(
+            IndoorConnector(
+                building_id=building.id, from_node_id=nodes[data.from_code].id,
+                to_node_id=nodes[data.to_code].id, kind=data.kind, length_m=data.length_m
+            )
+            for data in plan.connectors
+        )
+        # Routing caches per building are keyed on this version
+        building.version = Building.version + 1
+        db.commit()
+        bump_catalog_version(CatalogChange("updated", slug))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error saving indoor plan: {str(e)}")
+
+    return {
+        "slug": slug,
+        "floors": len(plan.floors),
+        "nodes": len(plan.nodes),
+        "connectors": len(plan.connectors)
+    }
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.orm import Session
+import hashlib
+import json
+from typing import Optional
+from backend.database.base import get_db
+from backend.database.models.building import Building
+from backend.utils.catalog import CatalogCache
+from backend.utils.geo_utils import MAX_ZOOM, ClusterGrid, extract_point
+from backend.utils.profiling import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# Serialised layers and their ETags per zoom level, plus the grid they are cut from
+_layer_cache = CatalogCache()
+
+
+def _load_markers(db: Session) -> list:
+    """Load the lightweight marker fields for every building with a location"""
+    rows = db.query(
+        Building.slug, Building.name, Building.department, Building.coordinates
+    ).order_by(Building.slug).all()
+
+    markers = []
+    for slug, name, department, coordinates in rows:
+        point = extract_point(coordinates)
+        if point is None:
+            continue
+        markers.append({
+            "slug": slug,
+            "name": name,
+            "department": department,
+            "lat": point[0],
+            "lng": point[1],
+        })
+    return markers
+
+
+def _building_feature(marker: dict) -> dict:
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [marker["lng"], marker["lat"]]},
+        "properties": {
+            "slug": marker["slug"],
+            "name": marker["name"],
+            "department": marker["department"],
+        },
+    }
+
+
+def _build_layer(db: Session, zoom: Optional[int]) -> tuple:
+    markers = _layer_cache.get("markers", lambda: _load_markers(db))
+
+    if zoom is None:
+        features = [_building_feature(marker) for marker in markers]
+    else:
+        grid = _layer_cache.get(
+            "grid", lambda: ClusterGrid([(m["lat"], m["lng"]) for m in markers])
+        )
+        features = []
+        for cluster_id, count, lat, lng, first in grid.clusters(zoom):
+            if count == 1:
+                features.append(_building_feature(markers[first]))
+                continue
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lng, lat]},
+                "properties": {
+                    "cluster": True,
+                    "cluster_id": cluster_id,
+                    "point_count": count,
+                },
+            })
+
+    collection = {"type": "FeatureCollection", "features": features}
+    body = json.dumps(collection, separators=(",", ":")).encode("utf-8")
+    # Named by content, so every worker agrees on it and it survives restarts
+    etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+    return body, etag
+
+
+@router.get("/map/buildings")
+def get_building_layer(
+    request: Request,
+    zoom: Optional[int] = Query(None, ge=0, le=MAX_ZOOM, description="Cluster markers for this zoom level"),
+    db: Session = Depends(get_db)
+):
+    layer, etag = _layer_cache.get(("layer", zoom), lambda: _build_layer(db, zoom))
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return Response(
+        content=layer,
+        media_type="application/geo+json",
+        headers={"ETag": etag}
+    )
@@ -0,0 +1,297 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, aliased
+import json
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+from backend.catalog_snapshot import snapshot
+from backend.database.base import SessionLocal, get_db
+from backend.database.models.building import Building
+from backend.database.models.indoor import Floor, IndoorConnector, IndoorNode
+from backend.database.models.schema import DistanceMatrixRequest, MatrixPoint
+from backend.utils.catalog import CatalogCache
+from backend.utils.geo_utils import WALKING_SPEED_MPS, CoordinateTable, haversine_matrix
+from backend.utils.indoor_routing import BuildingGraph, CampusGraph
+from backend.utils.routing import NavigationSession, WalkGraph
+from backend.utils.spatial_index import STRTree, point_in_polygon, ring_bbox
+from backend.utils.profiling import ProfiledRoute
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# Coordinate arrays and footprint index derived from the building catalog
+_coordinate_cache = CatalogCache()
+
+
+def get_coordinate_table(db: Session) -> CoordinateTable:
+    def build():
+        view = snapshot.view
+        if view is not None:
+            return CoordinateTable.from_arrays(view.slugs, view.lat, view.lng)
+        return CoordinateTable(db.query(Building.slug, Building.coordinates).all())
+
+    return _coordinate_cache.get("coordinates", build)
+
+
+def get_walk_graph(db: Session) -> WalkGraph:
+    def build():
+        names = dict(db.query(Building.slug, Building.name).all())
+        return WalkGraph(get_coordinate_table(db), names)
+
+    return _coordinate_cache.get("walk_graph", build)
+
+
+def _load_walk_graph() -> WalkGraph:
+    """Fetch the walk graph outside a request, holding a connection only on a cache miss"""
+    db = SessionLocal()
+    try:
+        return get_walk_graph(db)
+    finally:
+        db.close()
+
+
+# Indoor graphs by building id, kept while the building's version is unchanged.
+# Replaced as a whole, never mutated, since builds can overlap in the threadpool.
+_building_graphs: Dict[str, Tuple[int, BuildingGraph]] = {}
+
+
+def _load_building_graphs(db: Session) -> Dict[str, BuildingGraph]:
+    """Indoor graphs for every building with a plan, rebuilding only buildings that changed"""
+    global _building_graphs
+    previous = _building_graphs
+    buildings = db.query(Building.id, Building.slug, Building.version).filter(
+        db.query(IndoorNode.id).filter(IndoorNode.building_id == Building.id).exists()
+    ).all()
+
+    # Buildings without a plan any more are left out
+    graphs = {b.id: previous[b.id] for b in buildings if previous.get(b.id, (None,))[0] == b.version}
+    stale = [b.id for b in buildings if b.id not in graphs]
+    if stale:
+        nodes: Dict[str, list] = {building_id: [] for building_id in stale}
+        for building_id, code, name, kind, level, lat, lng in db.query(
+            IndoorNode.building_id, IndoorNode.code, IndoorNode.name, IndoorNode.kind,
+            Floor.level, IndoorNode.lat, IndoorNode.lng
+        ).join(Floor, Floor.id == IndoorNode.floor_id).filter(IndoorNode.building_id.in_(stale)):
+            nodes[building_id].append((code, name, kind, level, lat, lng))
+
+        connectors: Dict[str, list] = {building_id: [] for building_id in stale}
+        start = aliased(IndoorNode)
+        end = aliased(IndoorNode)
+        for building_id, from_code, to_code, kind, length in db.query(
+            IndoorConnector.building_id, start.code, end.code, IndoorConnector.kind, IndoorConnector.length_m
+        ).join(start, start.id == IndoorConnector.from_node_id).join(
+            end, end.id == IndoorConnector.to_node_id
+        ).filter(IndoorConnector.building_id.in_(stale)):
+            connectors[building_id].append((from_code, to_code, kind, length))
+
+        versions = {b.id: b.version for b in buildings}
+        slugs = {b.id: b.slug for b in buildings}
+        for building_id in stale:
+            graph = BuildingGraph(slugs[building_id], nodes[building_id], connectors[building_id])
+            graphs[building_id] = (versions[building_id], graph)
+
+    _building_graphs = graphs
+    # Keyed by the current slug, which can change without the plan changing
+    return {b.slug: graphs[b.id][1] for b in buildings}
+
+
+def get_campus_graph(db: Session) -> CampusGraph:
+    def build():
+        return CampusGraph(get_walk_graph(db), _load_building_graphs(db))
+
+    return _coordinate_cache.get("campus_graph", build)
+
+
+def _build_footprint_index(db: Session) -> STRTree:
+    rows = db.query(
+        Building.slug, Building.name, Building.department, Building.footprint
+    ).filter(Building.footprint.isnot(None)).all()
+
+    items = []
+    for slug, name, department, footprint in rows:
+        if not footprint or not footprint[0]:
+            continue
+        summary = {"slug": slug, "name": name, "department": department}
+        items.append((ring_bbox(footprint[0]), (summary, footprint)))
+    return STRTree(items)
+
+
+def get_footprint_index(db: Session) -> STRTree:
+    return _coordinate_cache.get("footprints", lambda: _build_footprint_index(db))
+
+
+def _resolve_locations(
+    table: CoordinateTable,
+    locations: List[Union[str, MatrixPoint]]
+) -> Tuple[np.ndarray, np.ndarray, list]:
+    """Turn slugs and points into radian arrays plus labels for the response"""
+    missing = [loc for loc in locations if isinstance(loc, str) and loc not in table]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Buildings not found: {', '.join(missing)}")
+
+    lat = np.empty(len(locations), dtype=np.float64)
+    lng = np.empty(len(locations), dtype=np.float64)
+    labels = []
+    for i, loc in enumerate(locations):
+        if isinstance(loc, str):
+            row = table.positions[loc]
+            lat[i] = table.lat[row]
+            lng[i] = table.lng[row]
+            labels.append(loc)
+        else:
+            lat[i] = np.radians(loc.lat)
+            lng[i] = np.radians(loc.lng)
+            labels.append({"lat": loc.lat, "lng": loc.lng})
+    return lat, lng, labels
+
+
+@router.post("/navigation/distance-matrix")
+def get_distance_matrix(request: DistanceMatrixRequest, db: Session = Depends(get_db)):
+    table = get_coordinate_table(db)
+
+    origin_lat, origin_lng, origins = _resolve_locations(table, request.origins)
+    if request.destinations is None:
+        dest_lat, dest_lng, destinations = origin_lat, origin_lng, origins
+    else:
+        dest_lat, dest_lng, destinations = _resolve_locations(table, request.destinations)
+
+    distances = haversine_matrix(origin_lat, origin_lng, dest_lat, dest_lng)
+    durations = distances / WALKING_SPEED_MPS
+
+    # Whole metres and seconds keep large matrices cheap to serialise
+    body = {
+        "origins": origins,
+        "destinations": destinations,
+        "distances": np.rint(distances).astype(np.int64).tolist(),
+        "durations": np.rint(durations).astype(np.int64).tolist(),
+    }
+    return Response(
+        content=json.dumps(body, separators=(",", ":")),
+        media_type="application/json"
+    )
+
+
+@router.get("/navigation/locate")
+def locate(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    db: Session = Depends(get_db)
+):
+    index = get_footprint_index(db)
+
+    # Bounding boxes narrow the candidates before the exact polygon test
+    buildings = [
+        summary
+        for summary, footprint in index.query_point(lng, lat)
+        if point_in_polygon(lng, lat, footprint)
+    ]
+    return {"lat": lat, "lng": lng, "buildings": buildings}
+
+
+def _resolve_place(campus: CampusGraph, slug: str, room: Optional[str]) -> tuple:
+    if slug not in campus:
+        raise HTTPException(status_code=404, detail=f"Building not found: {slug}")
+    if room is None:
+        return ("building", slug)
+    graph = campus.buildings.get(slug)
+    if graph is None or room not in graph.positions:
+        raise HTTPException(status_code=404, detail=f"Room {room} not found in {slug}")
+    return ("room", slug, graph.positions[room])
+
+
+@router.get("/navigation/route")
+def get_route(
+    destination: str = Query(..., description="Destination building slug"),
+    room: Optional[str] = Query(None, description="Destination room code"),
+    origin: Optional[str] = Query(None, description="Origin building slug, instead of lat/lng"),
+    origin_room: Optional[str] = Query(None, description="Origin room code"),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    db: Session = Depends(get_db)
+):
+    if origin is None and (lat is None or lng is None):
+        raise HTTPException(status_code=400, detail="Either origin or both lat and lng are required")
+    if origin_room is not None and origin is None:
+        raise HTTPException(status_code=400, detail="origin_room requires origin")
+
+    if room is not None or origin is not None:
+        # Indoor legs come from per-building entrance trees; only portals are searched outdoors
+        campus = get_campus_graph(db)
+        start = _resolve_place(campus, origin, origin_room) if origin else ("point", lat, lng)
+        result = campus.route(start, _resolve_place(campus, destination, room))
+        if result is None:
+            raise HTTPException(status_code=404, detail="No route to destination")
+        distance, steps = result
+        return {"remaining_m": round(distance), "steps": steps}
+
+    graph = get_walk_graph(db)
+    if destination not in graph.table:
+        raise HTTPException(status_code=404, detail="Building not found")
+
+    session = NavigationSession(graph, destination)
+    message = session.start(lat, lng)
+    if message is None:
+        raise HTTPException(status_code=404, detail="No route to destination")
+    if message["type"] == "arrived":
+        return {"remaining_m": 0, "steps": []}
+
+    return {
+        "remaining_m": message["remaining_m"],
+        "steps": session.steps(lat, lng, limit=len(session.waypoints))
+    }
+
+
+@router.websocket("/navigation/sessions")
+async def navigation_session(websocket: WebSocket, destination: str):
+    """Stream position fixes in, receive only instructions that changed.
+
+    Clients send {"lat": ..., "lng": ...}; the server answers with "instruction"
+    messages when the next waypoint changes, flags reroutes, and sends
+    "arrived" before closing.
+    """
+    await websocket.accept()
+
+    graph = await run_in_threadpool(_load_walk_graph)
+    if destination not in graph.table:
+        await websocket.send_json({"type": "error", "detail": "Building not found"})
+        await websocket.close(code=1008)
+        return
+
+    # The shortest-path tree is built once here and reused for every reroute
+    session = await run_in_threadpool(NavigationSession, graph, destination)
+    started = False
+
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            try:
+                data = json.loads(frame.get("text") or frame.get("bytes") or b"")
+                lat = float(data["lat"])
+                lng = float(data["lng"])
+            except (KeyError, TypeError, ValueError):
+                await websocket.send_json({"type": "error", "detail": "Position must contain numeric lat and lng"})
+                continue
+
+            if not started:
+                message = session.start(lat, lng)
+                if message is None:
+                    await websocket.send_json({"type": "error", "detail": "No route to destination"})
+                    await websocket.close(code=1011)
+                    return
+                started = True
+            else:
+                message, rerouted = session.update(lat, lng)
+                if message is not None and rerouted:
+                    message["rerouted"] = True
+
+            if message is not None:
+                await websocket.send_json(message)
+            if session.arrived:
+                await websocket.close()
+                return
+    except WebSocketDisconnect:
+        logger.debug(f"Navigation session to {destination} closed by client")
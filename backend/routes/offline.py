@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from backend.core.admin import require_admin
+from backend.database.base import get_db
+from backend.offline_bundle import build_bundle, store
+from backend.utils.profiling import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+BUNDLE_MEDIA_TYPE = "application/x-msgpack"
+
+
+def _latest_or_404() -> dict:
+    latest = store.latest()
+    if not latest:
+        raise HTTPException(status_code=404, detail="No offline bundle has been built")
+    return latest
+
+
+@router.get("/offline/manifest")
+def get_offline_manifest():
+    latest = _latest_or_404()
+    return {
+        "version": latest["version"],
+        "hash": latest["hash"],
+        "size": latest["size"],
+        "bundle_url": "/api/offline/bundle",
+    }
+
+
+@router.get("/offline/bundle")
+def get_offline_bundle(request: Request):
+    latest = _latest_or_404()
+    etag = f'"{latest["hash"]}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return FileResponse(
+        store.bundle_path(latest["hash"]),
+        media_type=BUNDLE_MEDIA_TYPE,
+        headers={"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+
+@router.get("/offline/patches")
+def get_offline_patches(from_hash: str = Query(..., alias="from")):
+    latest = _latest_or_404()
+    chain = store.patch_chain(from_hash)
+    if chain is None:
+        # Too old or unknown: the client has to download the full bundle again
+        raise HTTPException(status_code=410, detail="Version no longer available, download the full bundle")
+
+    return {
+        "version": latest["version"],
+        "hash": latest["hash"],
+        "patches": [
+            dict(patch, url=f"/api/offline/deltas/{patch['from']}/{patch['to']}") for patch in chain
+        ],
+    }
+
+
+@router.get("/offline/deltas/{from_hash}/{to_hash}")
+def get_offline_delta(from_hash: str, to_hash: str):
+    chain = store.patch_chain(from_hash)
+    if not chain or chain[0]["to"] != to_hash:
+        raise HTTPException(status_code=404, detail="Delta not found")
+
+    return FileResponse(
+        store.delta_path(from_hash, to_hash),
+        media_type="application/octet-stream",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+
+@router.post("/offline/build", dependencies=[Depends(require_admin)])
+def build_offline_bundle(db: Session = Depends(get_db)):
+    try:
+        return build_bundle(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building offline bundle: {str(e)}")
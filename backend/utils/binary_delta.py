@@ -0,0 +1,110 @@
+import hashlib
+from typing import Dict, Tuple
+
+# Delta layout: MAGIC, sha256(source), sha256(target), then a stream of ops:
+#   b"C" <varint offset> <varint length>  copy bytes from the source
+#   b"I" <varint length> <bytes>          insert literal bytes
+MAGIC = b"NVD1"
+BLOCK_SIZE = 32
+
+
+class DeltaError(Exception):
+    """Raised when a delta does not apply to the given source"""
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise DeltaError("Truncated delta")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def make_delta(source: bytes, target: bytes, block_size: int = BLOCK_SIZE) -> bytes:
+    """Encode target as copies from source plus literal inserts"""
+    out = bytearray(MAGIC)
+    out += hashlib.sha256(source).digest()
+    out += hashlib.sha256(target).digest()
+
+    # First offset of every aligned block in the source
+    blocks: Dict[bytes, int] = {}
+    for offset in range(0, len(source) - block_size + 1, block_size):
+        blocks.setdefault(source[offset:offset + block_size], offset)
+
+    literal_start = 0
+    pos = 0
+    limit = len(target) - block_size
+    while pos <= limit:
+        offset = blocks.get(target[pos:pos + block_size])
+        if offset is None:
+            pos += 1
+            continue
+
+        # Grow the match backwards into pending literals, then forwards
+        start, source_start = pos, offset
+        while start > literal_start and source_start > 0 and target[start - 1] == source[source_start - 1]:
+            start -= 1
+            source_start -= 1
+        end, source_end = pos + block_size, offset + block_size
+        while end < len(target) and source_end < len(source) and target[end] == source[source_end]:
+            end += 1
+            source_end += 1
+
+        if start > literal_start:
+            out += b"I"
+            _write_varint(out, start - literal_start)
+            out += target[literal_start:start]
+        out += b"C"
+        _write_varint(out, source_start)
+        _write_varint(out, end - start)
+
+        pos = literal_start = end
+
+    if literal_start < len(target):
+        out += b"I"
+        _write_varint(out, len(target) - literal_start)
+        out += target[literal_start:]
+
+    return bytes(out)
+
+
+def apply_delta(source: bytes, delta: bytes) -> bytes:
+    """Rebuild the target from the source and a delta made by make_delta"""
+    header = len(MAGIC) + 64
+    if len(delta) < header or not delta.startswith(MAGIC):
+        raise DeltaError("Not a delta")
+    if hashlib.sha256(source).digest() != delta[len(MAGIC):len(MAGIC) + 32]:
+        raise DeltaError("Delta was made for a different source")
+
+    out = bytearray()
+    pos = header
+    while pos < len(delta):
+        op = delta[pos:pos + 1]
+        pos += 1
+        if op == b"C":
+            offset, pos = _read_varint(delta, pos)
+            length, pos = _read_varint(delta, pos)
+            out += source[offset:offset + length]
+        elif op == b"I":
+            length, pos = _read_varint(delta, pos)
+            out += delta[pos:pos + length]
+            pos += length
+        else:
+            raise DeltaError(f"Unknown delta op {op!r}")
+
+    if hashlib.sha256(out).digest() != delta[len(MAGIC) + 32:header]:
+        raise DeltaError("Delta produced the wrong target")
+    return bytes(out)
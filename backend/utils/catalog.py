@@ -0,0 +1,107 @@
+import logging
+import threading
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Monotonic version of the building catalog held by this process. Every route
+# that mutates a building bumps it so derived data (map layers, indexes, ...)
+# is rebuilt on the next read instead of on every read.
+_version_lock = threading.Lock()
+_catalog_version = 0
+
+
+class CatalogChange(NamedTuple):
+    """What a mutation route changed"""
+    kind: str  # "created", "updated", "image_changed" or "image_deleted"
+    slug: str
+    # Set when an update renamed the building's slug
+    previous_slug: Optional[str] = None
+    image_changed: bool = False
+
+
+# Called with the new version and its changes after a mutation in this process
+_listeners: List[Callable[[int, Tuple[CatalogChange, ...]], None]] = []
+
+
+def get_catalog_version() -> int:
+    """Return the current catalog version"""
+    return _catalog_version
+
+
+def add_catalog_listener(listener: Callable[[int, Tuple[CatalogChange, ...]], None]):
+    """Register a callback run after every local catalog change"""
+    _listeners.append(listener)
+
+
+def bump_catalog_version(*changes: CatalogChange, notify: bool = True) -> int:
+    """Mark the catalog as changed and return the new version.
+
+    Several changes committed in one transaction are passed together so
+    listeners run once for the batch.
+
+    Pass notify=False when the change was made elsewhere (e.g. by another
+    worker) and only local caches need to be dropped.
+    """
+    global _catalog_version
+    with _version_lock:
+        _catalog_version += 1
+        version = _catalog_version
+
+    if notify:
+        for listener in _listeners:
+            try:
+                listener(version, changes)
+            except Exception as e:
+                logger.error(f"Catalog listener failed: {e}")
+    return version
+
+
+async def bump_catalog_version_async(*changes: CatalogChange) -> int:
+    """bump_catalog_version for async routes.
+
+    Listeners query the database and write files, so they run in the
+    threadpool instead of blocking the event loop; the route still waits
+    for them, so its response is consistent with the next read.
+    """
+    return await run_in_threadpool(bump_catalog_version, *changes)
+
+
+class CatalogCache:
+    """Cache of values derived from the catalog, dropped when the version changes.
+
+    Pass max_entries when keys come from clients; the oldest entries are
+    evicted beyond it.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = -1
+        self._values: Dict[Hashable, Any] = {}
+
+    def get(self, key: Hashable, builder: Callable[[], Any]) -> Any:
+        version = get_catalog_version()
+        with self._lock:
+            if self._version != version:
+                self._values.clear()
+                self._version = version
+            if key in self._values:
+                return self._values[key]
+
+        # Build outside the lock so slow builders don't block other keys
+        value = builder()
+
+        with self._lock:
+            if self._version == version:
+                self._values[key] = value
+                if self.max_entries is not None:
+                    while len(self._values) > self.max_entries:
+                        del self._values[next(iter(self._values))]
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._version = -1
@@ -0,0 +1,84 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def normalize_term(term: str) -> str:
+    """Normalise a facility or department name for case-insensitive matching"""
+    return " ".join(term.split()).lower()
+
+
+class FacilityIndex:
+    """In-memory inverted index from facilities and departments to building slugs"""
+
+    def __init__(self, rows: Iterable[Tuple[str, str, Optional[List[str]]]]):
+        self.facilities: Dict[str, Set[str]] = {}
+        self.departments: Dict[str, Set[str]] = {}
+        # Display labels keyed by normalised term
+        self.facility_labels: Dict[str, str] = {}
+        self.department_labels: Dict[str, str] = {}
+        self._building_facilities: Dict[str, Set[str]] = {}
+        self._building_department: Dict[str, str] = {}
+        self.all_slugs: Set[str] = set()
+
+        for slug, department, facilities in rows:
+            self.all_slugs.add(slug)
+
+            key = normalize_term(department or "")
+            self.departments.setdefault(key, set()).add(slug)
+            self.department_labels.setdefault(key, department)
+            self._building_department[slug] = key
+
+            keys = set()
+            for facility in facilities or []:
+                key = normalize_term(facility)
+                if not key:
+                    continue
+                keys.add(key)
+                self.facilities.setdefault(key, set()).add(slug)
+                self.facility_labels.setdefault(key, facility)
+            self._building_facilities[slug] = keys
+
+    def filter(
+        self,
+        facilities: Optional[List[str]] = None,
+        departments: Optional[List[str]] = None,
+        match_all: bool = True
+    ) -> Set[str]:
+        """Return slugs matching the facilities (AND or OR) and any of the departments"""
+        result = self.all_slugs
+
+        if facilities:
+            postings = [self.facilities.get(normalize_term(f), set()) for f in facilities]
+            if match_all:
+                # Intersect smallest posting lists first
+                postings.sort(key=len)
+                result = set.intersection(*postings)
+            else:
+                result = set().union(*postings)
+
+        if departments:
+            allowed = set().union(
+                *(self.departments.get(normalize_term(d), set()) for d in departments)
+            )
+            result = result & allowed
+
+        return set(result)
+
+    def facets(self, slugs: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        """Count facilities and departments across a set of buildings"""
+        facility_counts = Counter()
+        department_counts = Counter()
+        for slug in slugs:
+            facility_counts.update(self._building_facilities.get(slug, ()))
+            department = self._building_department.get(slug)
+            if department is not None:
+                department_counts[department] += 1
+
+        return {
+            "facility": {
+                self.facility_labels[key]: count for key, count in facility_counts.most_common()
+            },
+            "department": {
+                self.department_labels[key]: count for key, count in department_counts.most_common()
+            },
+        }
@@ -0,0 +1,155 @@
+import math
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Highest zoom level the map layer is clustered for
+MAX_ZOOM = 20
+# Clusters are built on a grid 2**CELL_BITS times finer than map tiles,
+# i.e. 64px cells on 256px tiles
+CELL_BITS = 2
+# Web Mercator is undefined at the poles
+MAX_LATITUDE = 85.05112878
+
+
+def extract_point(coordinates) -> Optional[Tuple[float, float]]:
+    """Return (lat, lng) from a building's coordinates JSON, or None if unusable"""
+    if not isinstance(coordinates, dict):
+        return None
+    lat = coordinates.get("lat")
+    lng = coordinates.get("lng")
+    if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+        return None
+    return float(lat), float(lng)
+
+
+def project(lat: float, lng: float) -> Tuple[float, float]:
+    """Project lat/lng to normalised Web Mercator coordinates in [0, 1]"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = (lng + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+
+class ClusterGrid:
+    """Hierarchical grid of point clusters for every zoom level.
+
+    The finest level is built by bucketing points into grid cells; each coarser
+    level merges the four child cells of the level below, so clusters for any
+    zoom are a dictionary lookup rather than a pass over every point.
+    """
+
+    def __init__(self, points: Sequence[Tuple[float, float]], max_zoom: int = MAX_ZOOM):
+        self.max_zoom = max_zoom
+        # Each level maps (cell_x, cell_y) -> [count, lat_sum, lng_sum, first_index]
+        self.levels: List[Dict[Tuple[int, int], list]] = [{} for _ in range(max_zoom + 1)]
+
+        scale = 1 << (max_zoom + CELL_BITS)
+        finest = self.levels[max_zoom]
+        for index, (lat, lng) in enumerate(points):
+            x, y = project(lat, lng)
+            key = (min(int(x * scale), scale - 1), min(int(y * scale), scale - 1))
+            cell = finest.get(key)
+            if cell is None:
+                finest[key] = [1, lat, lng, index]
+            else:
+                cell[0] += 1
+                cell[1] += lat
+                cell[2] += lng
+
+        for zoom in range(max_zoom - 1, -1, -1):
+            parent = self.levels[zoom]
+            for (cx, cy), (count, lat_sum, lng_sum, first) in self.levels[zoom + 1].items():
+                key = (cx >> 1, cy >> 1)
+                cell = parent.get(key)
+                if cell is None:
+                    parent[key] = [count, lat_sum, lng_sum, first]
+                else:
+                    cell[0] += count
+                    cell[1] += lat_sum
+                    cell[2] += lng_sum
+
+    def clusters(self, zoom: int) -> List[Tuple[str, int, float, float, int]]:
+        """Return (cluster_id, count, lat, lng, first_index) for each cell at a zoom"""
+        zoom = max(0, min(self.max_zoom, zoom))
+        return [
+            (f"{zoom}/{cx}/{cy}", count, lat_sum / count, lng_sum / count, first)
+            for (cx, cy), (count, lat_sum, lng_sum, first) in self.levels[zoom].items()
+        ]
+
+
+# Mean Earth radius in metres
+EARTH_RADIUS_M = 6371008.8
+# Average walking speed used for time estimates (~5 km/h)
+WALKING_SPEED_MPS = 1.4
+
+
+class CoordinateTable:
+    """Building coordinates held as radian arrays for vectorised distance maths"""
+
+    def __init__(self, rows: Iterable[Tuple[str, object]]):
+        slugs = []
+        lats = []
+        lngs = []
+        for slug, coordinates in rows:
+            point = extract_point(coordinates)
+            if point is None:
+                continue
+            slugs.append(slug)
+            lats.append(point[0])
+            lngs.append(point[1])
+
+        self.slugs: List[str] = slugs
+        self.positions: Dict[str, int] = {slug: i for i, slug in enumerate(slugs)}
+        self.lat = np.radians(np.asarray(lats, dtype=np.float64))
+        self.lng = np.radians(np.asarray(lngs, dtype=np.float64))
+
+    @classmethod
+    def from_arrays(cls, slugs: List[str], lat: np.ndarray, lng: np.ndarray) -> "CoordinateTable":
+        """Wrap existing radian arrays (e.g. from a shared snapshot) without copying"""
+        table = cls.__new__(cls)
+        table.slugs = slugs
+        table.positions = {slug: i for i, slug in enumerate(slugs)}
+        table.lat = lat
+        table.lng = lng
+        return table
+
+    def __len__(self) -> int:
+        return len(self.slugs)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self.positions
+
+    def point(self, slug: str) -> Tuple[float, float]:
+        """Return (lat, lng) in degrees for a building"""
+        i = self.positions[slug]
+        return math.degrees(self.lat[i]), math.degrees(self.lng[i])
+
+
+def haversine_matrix(
+    origin_lat: np.ndarray,
+    origin_lng: np.ndarray,
+    dest_lat: np.ndarray,
+    dest_lng: np.ndarray
+) -> np.ndarray:
+    """Great-circle distances in metres between every origin and destination.
+
+    All inputs are in radians; the result has shape (len(origins), len(destinations)).
+    """
+    lat1 = origin_lat[:, None]
+    lat2 = dest_lat[None, :]
+    dlat = lat2 - lat1
+    dlng = dest_lng[None, :] - origin_lng[:, None]
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in metres between two points given in degrees"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, a)))
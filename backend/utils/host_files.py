@@ -0,0 +1,33 @@
+"""Files shared by the workers on one host"""
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+# Without fcntl there is no cross-process locking; fine for a single worker
+CAN_LOCK = fcntl is not None
+
+
+def host_path(path: str) -> str:
+    """Use the temp dir when the configured directory does not exist.
+
+    The defaults live in /dev/shm, which e.g. macOS lacks; the temp dir is
+    still shared through the page cache by every worker on the host.
+    """
+    if path and not os.path.isdir(os.path.dirname(path)):
+        return os.path.join(tempfile.gettempdir(), os.path.basename(path))
+    return path
+
+
+def lock_file(f):
+    """Block until this process holds the exclusive lock on an open file"""
+    if CAN_LOCK:
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+
+def unlock_file(f):
+    if CAN_LOCK:
+        fcntl.flock(f, fcntl.LOCK_UN)
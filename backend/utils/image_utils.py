@@ -107,4 +107,62 @@ def validate_image_file(file: UploadFile) -> bool:
         return False
     
     allowed_types = ['image/jpeg', 'image/png', 'image/gif']
-    return file.content_type in allowed_types
\ No newline at end of file
+    return file.content_type in allowed_types
+
+def make_thumbnail(image_data: bytes, max_size: int = 256, quality: int = 70) -> bytes:
+    """
+    Downscale stored image data to a JPEG thumbnail no larger than max_size on either side
+    """
+    img = Image.open(io.BytesIO(image_data))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img.thumbnail((max_size, max_size))
+
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def reencode_image(image_data: bytes, mime_type: Optional[str], max_size: Optional[int] = None,
+                   quality: int = 85) -> tuple[bytes, str]:
+    """
+    Re-encode stored image data, optionally downscaling it, and return (binary_data, mime_type)
+    """
+    img = Image.open(io.BytesIO(image_data))
+    img.load()
+
+    if max_size:
+        img.thumbnail((max_size, max_size))
+
+    output = io.BytesIO()
+    if mime_type == 'image/jpeg':
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        mime_type = 'image/png'
+        img.save(output, format='PNG', optimize=True)
+    return output.getvalue(), mime_type
+
+
+def make_sprite(thumbnails: list[bytes], tile_size: int, columns: int,
+                quality: int = 80) -> tuple[bytes, list[tuple[int, int, int, int]], tuple[int, int]]:
+    """
+    Pack thumbnails into a grid of tile_size cells and return (jpeg_data, [(x, y, w, h)], (width, height))
+    """
+    columns = max(1, min(columns, len(thumbnails)))
+    rows = max(1, -(-len(thumbnails) // columns))
+    width, height = columns * tile_size, rows * tile_size
+    sheet = Image.new('RGB', (width, height), (255, 255, 255))
+
+    offsets = []
+    for i, data in enumerate(thumbnails):
+        tile = Image.open(io.BytesIO(data))
+        x = (i % columns) * tile_size
+        y = (i // columns) * tile_size
+        sheet.paste(tile, (x, y))
+        offsets.append((x, y, tile.width, tile.height))
+
+    output = io.BytesIO()
+    sheet.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue(), offsets, (width, height)
@@ -0,0 +1,310 @@
+import heapq
+import math
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+from backend.utils.geo_utils import haversine, haversine_matrix
+from backend.utils.routing import GRAPH_NEIGHBOURS, WalkGraph
+
+# Extra metres of walking that climbing one floor by stairs is worth
+STAIRS_M_PER_LEVEL = 15.0
+# Waiting for a lift counts as a fixed distance, plus a little per floor
+LIFT_WAIT_M = 40.0
+LIFT_M_PER_LEVEL = 4.0
+
+# (code, name, kind, level, lat, lng)
+NodeRow = Tuple[str, Optional[str], str, int, float, float]
+# (from_code, to_code, kind, length_m)
+ConnectorRow = Tuple[str, str, str, Optional[float]]
+# ("room", slug, node index), ("building", slug) or ("point", lat, lng)
+Place = tuple
+
+
+def dijkstra(
+    adjacency: List[Dict[int, float]],
+    sources: Dict[int, float],
+    targets: Optional[Dict[int, float]] = None
+) -> Tuple[np.ndarray, np.ndarray, Optional[int]]:
+    """Multi-source Dijkstra over adjacency dicts.
+
+    Without targets the whole reachable graph is settled. With targets
+    (node -> cost of finishing there) the search stops as soon as no cheaper
+    finish is possible. Returns (distance, previous, best_target).
+    """
+    distance = np.full(len(adjacency), np.inf)
+    previous = np.full(len(adjacency), -1, dtype=np.int64)
+    heap = []
+    for node, cost in sources.items():
+        if cost < distance[node]:
+            distance[node] = cost
+            heap.append((cost, node))
+    heapq.heapify(heap)
+
+    best, best_cost = None, math.inf
+    while heap:
+        d, node = heapq.heappop(heap)
+        if d > distance[node]:
+            continue
+        if d >= best_cost:
+            break
+        if targets is not None and node in targets and d + targets[node] < best_cost:
+            best, best_cost = node, d + targets[node]
+        for neighbour, weight in adjacency[node].items():
+            candidate = d + weight
+            if candidate < distance[neighbour]:
+                distance[neighbour] = candidate
+                previous[neighbour] = node
+                heapq.heappush(heap, (candidate, neighbour))
+
+    return distance, previous, best
+
+
+def _walk_back(previous: np.ndarray, node: int) -> List[int]:
+    path = [node]
+    while previous[node] >= 0:
+        node = int(previous[node])
+        path.append(node)
+    path.reverse()
+    return path
+
+
+class BuildingGraph:
+    """Indoor network of one building.
+
+    A shortest-path tree is kept for every entrance, so the distance and path
+    between any room and any entrance, and between entrances, is a lookup.
+    """
+
+    def __init__(self, slug: str, nodes: Iterable[NodeRow], connectors: Iterable[ConnectorRow]):
+        self.slug = slug
+        self.codes: List[str] = []
+        self.names: List[Optional[str]] = []
+        self.kinds: List[str] = []
+        self.levels: List[int] = []
+        lat, lng = [], []
+        for code, name, kind, level, node_lat, node_lng in nodes:
+            self.codes.append(code)
+            self.names.append(name)
+            self.kinds.append(kind)
+            self.levels.append(level)
+            lat.append(node_lat)
+            lng.append(node_lng)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.positions = {code: i for i, code in enumerate(self.codes)}
+
+        self.adjacency: List[Dict[int, float]] = [{} for _ in self.codes]
+        # (from, to) -> connector kind, to describe level changes
+        self.via: Dict[Tuple[int, int], str] = {}
+        for from_code, to_code, kind, length in connectors:
+            a = self.positions[from_code]
+            b = self.positions[to_code]
+            weight = self._connector_length(a, b, kind, length)
+            if weight < self.adjacency[a].get(b, math.inf):
+                self.adjacency[a][b] = self.adjacency[b][a] = weight
+                self.via[(a, b)] = self.via[(b, a)] = kind
+
+        self.entrances = [i for i, kind in enumerate(self.kinds) if kind == "entrance"]
+        self.entrance_distance = np.full((len(self.entrances), len(self.codes)), np.inf)
+        self.entrance_next = np.full((len(self.entrances), len(self.codes)), -1, dtype=np.int64)
+        for row, entrance in enumerate(self.entrances):
+            # Connectors are two-way, so the tree from an entrance leads back to it
+            distance, previous, _ = dijkstra(self.adjacency, {entrance: 0.0})
+            self.entrance_distance[row] = distance
+            self.entrance_next[row] = previous
+        # Entrance-to-entrance distances through the building
+        self.portal_distance = self.entrance_distance[:, self.entrances]
+
+    def _connector_length(self, a: int, b: int, kind: str, length: Optional[float]) -> float:
+        if length is not None:
+            return float(length)
+        weight = haversine(self.lat[a], self.lng[a], self.lat[b], self.lng[b])
+        levels = abs(self.levels[a] - self.levels[b])
+        if kind == "lift":
+            return weight + LIFT_WAIT_M + LIFT_M_PER_LEVEL * levels
+        return weight + STAIRS_M_PER_LEVEL * levels
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def path_to_entrance(self, node: int, row: int) -> List[int]:
+        """Nodes from `node` to the entrance in row `row`, both included"""
+        path = [node]
+        while self.entrance_next[row, node] >= 0:
+            node = int(self.entrance_next[row, node])
+            path.append(node)
+        return path
+
+    def path(self, a: int, b: int) -> Tuple[float, List[int]]:
+        """Shortest indoor path between two nodes; (inf, []) if they are not connected"""
+        distance, previous, best = dijkstra(self.adjacency, {a: 0.0}, {b: 0.0})
+        if best is None:
+            return math.inf, []
+        return float(distance[b]), _walk_back(previous, b)
+
+
+class CampusGraph:
+    """Outdoor walk graph with building entrances attached as portals.
+
+    Searches only visit outdoor nodes and portals. Portals of one building
+    are linked by their precomputed indoor distances, and the indoor legs at
+    either end of a route are read from the building's entrance trees.
+    """
+
+    def __init__(self, walk: WalkGraph, buildings: Dict[str, BuildingGraph], neighbours: int = GRAPH_NEIGHBOURS):
+        self.walk = walk
+        self.buildings = buildings
+        self.adjacency: List[Dict[int, float]] = [dict(edges) for edges in walk.adjacency]
+        # Overlay node -> (slug, entrance row) for portals
+        self.portals: Dict[int, Tuple[str, int]] = {}
+        # slug -> overlay node of each entrance, in entrance row order
+        self.portal_nodes: Dict[str, List[int]] = {}
+
+        outdoor = len(walk)
+        portal_lat, portal_lng = [], []
+        for slug, graph in buildings.items():
+            nodes = []
+            for row, entrance in enumerate(graph.entrances):
+                node = len(self.adjacency)
+                self.adjacency.append({})
+                self.portals[node] = (slug, row)
+                nodes.append(node)
+                portal_lat.append(graph.lat[entrance])
+                portal_lng.append(graph.lng[entrance])
+            self.portal_nodes[slug] = nodes
+
+            # Cutting through a building is one hop between its entrances
+            for a, node_a in enumerate(nodes):
+                for b, node_b in enumerate(nodes):
+                    if a != b and np.isfinite(graph.portal_distance[a, b]):
+                        self.adjacency[node_a][node_b] = float(graph.portal_distance[a, b])
+
+        self.lat = np.concatenate([walk.table.lat, np.radians(portal_lat)])
+        self.lng = np.concatenate([walk.table.lng, np.radians(portal_lng)])
+
+        # Join each entrance to the outdoor nodes nearest to it and to its own building
+        k = min(neighbours, outdoor)
+        if self.portals and k > 0:
+            dist = haversine_matrix(self.lat[outdoor:], self.lng[outdoor:], walk.table.lat, walk.table.lng)
+            nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            for row, (node, (slug, _)) in enumerate(self.portals.items()):
+                columns = set(int(j) for j in nearest[row])
+                if slug in walk.table:
+                    columns.add(walk.table.positions[slug])
+                for j in columns:
+                    weight = float(dist[row, j])
+                    self.adjacency[node][j] = weight
+                    self.adjacency[j][node] = weight
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self.walk.table or slug in self.buildings
+
+    def _ends(self, place: Place) -> Dict[int, Tuple[float, list]]:
+        """Overlay nodes a route can start or finish at, with the cost and
+        waypoints between each of them and the place (waypoints run away from
+        the place and exclude the overlay node itself)"""
+        kind = place[0]
+        if kind == "room":
+            _, slug, node = place
+            graph = self.buildings[slug]
+            ends = {}
+            for row, portal in enumerate(self.portal_nodes[slug]):
+                cost = graph.entrance_distance[row, node]
+                if np.isfinite(cost):
+                    path = graph.path_to_entrance(node, row)
+                    ends[portal] = (float(cost), [("indoor", slug, i) for i in path[:-1]])
+            return ends
+
+        if kind == "building":
+            slug = place[1]
+            if slug in self.walk.table:
+                return {self.walk.table.positions[slug]: (0.0, [])}
+            return {portal: (0.0, []) for portal in self.portal_nodes.get(slug, [])}
+
+        _, lat, lng = place
+        dist = haversine_matrix(np.radians([lat]), np.radians([lng]), self.lat, self.lng)[0]
+        k = min(GRAPH_NEIGHBOURS, len(dist))
+        if k == 0:
+            return {}
+        return {int(j): (float(dist[j]), []) for j in np.argpartition(dist, k - 1)[:k]}
+
+    def route(self, origin: Place, destination: Place) -> Optional[Tuple[float, List[dict]]]:
+        """Shortest route between two places as (distance_m, steps); None if unreachable"""
+        if origin[0] == "room" and destination[0] == "room" and origin[1] == destination[1]:
+            graph = self.buildings[origin[1]]
+            distance, path = graph.path(origin[2], destination[2])
+            if path:
+                return distance, self._steps(origin, [("indoor", origin[1], i) for i in path[1:]])
+
+        sources = self._ends(origin)
+        targets = self._ends(destination)
+        distance, previous, best = dijkstra(
+            self.adjacency,
+            {node: cost for node, (cost, _) in sources.items()},
+            {node: cost for node, (cost, _) in targets.items()}
+        )
+        if best is None:
+            return None
+
+        overlay = _walk_back(previous, best)
+        waypoints = sources[overlay[0]][1][1:]
+        for i, node in enumerate(overlay):
+            if node in self.portals:
+                slug, row = self.portals[node]
+                graph = self.buildings[slug]
+                previous_node = overlay[i - 1] if i else None
+                if previous_node in self.portals and self.portals[previous_node][0] == slug:
+                    # Indoor shortcut: expand the walk between the two entrances
+                    entrance = graph.entrances[self.portals[previous_node][1]]
+                    waypoints.extend(("indoor", slug, j) for j in graph.path_to_entrance(entrance, row)[1:])
+                else:
+                    waypoints.append(("indoor", slug, graph.entrances[row]))
+            else:
+                waypoints.append(("outdoor", node))
+        waypoints.extend(reversed(targets[best][1]))
+
+        total = float(distance[best]) + targets[best][0]
+        return total, self._steps(origin, waypoints)
+
+    def _position(self, waypoint: tuple) -> Tuple[float, float]:
+        if waypoint[0] == "indoor":
+            graph = self.buildings[waypoint[1]]
+            return graph.lat[waypoint[2]], graph.lng[waypoint[2]]
+        return self.walk.point(waypoint[1])
+
+    def _steps(self, origin: Place, waypoints: List[tuple]) -> List[dict]:
+        if origin[0] == "point":
+            previous_point = (origin[1], origin[2])
+        elif origin[0] == "room":
+            previous_point = self._position(("indoor", origin[1], origin[2]))
+        else:
+            previous_point = self._position(waypoints[0]) if waypoints else None
+        previous = ("indoor", origin[1], origin[2]) if origin[0] == "room" else None
+
+        steps = []
+        for waypoint in waypoints:
+            if waypoint == previous:
+                continue
+            lat, lng = self._position(waypoint)
+            if waypoint[0] == "indoor":
+                slug, node = waypoint[1], waypoint[2]
+                graph = self.buildings[slug]
+                step = {
+                    "type": "indoor",
+                    "slug": slug,
+                    "code": graph.codes[node],
+                    "name": graph.names[node] or graph.codes[node],
+                    "kind": graph.kinds[node],
+                    "level": graph.levels[node],
+                }
+                if previous is not None and previous[0] == "indoor" and (previous[2], node) in graph.via:
+                    step["via"] = graph.via[(previous[2], node)]
+            else:
+                slug = self.walk.table.slugs[waypoint[1]]
+                step = {"type": "outdoor", "slug": slug, "name": self.walk.names.get(slug, slug)}
+            step["lat"] = float(lat)
+            step["lng"] = float(lng)
+            step["distance_m"] = round(haversine(previous_point[0], previous_point[1], lat, lng))
+            steps.append(step)
+            previous_point = (lat, lng)
+            previous = waypoint
+        return steps
@@ -0,0 +1,200 @@
+import asyncio
+import contextlib
+import contextvars
+import cProfile
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, List, Optional
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger(__name__)
+
+# Profiler of the request being handled, when it asked to be profiled
+request_profile_var: contextvars.ContextVar[Optional[cProfile.Profile]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+# Innermost frames of threads that are only waiting; left out of samples by default
+IDLE_FRAMES = {
+    ("threading", "wait"),
+    ("threading", "Condition.wait"),
+    ("selectors", "select"),
+    ("selectors", "EpollSelector.select"),
+    ("selectors", "KqueueSelector.select"),
+    ("queue", "get"),
+    ("queue", "Queue.get"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _is_idle(frame) -> bool:
+    return (frame.f_globals.get("__name__"), getattr(frame.f_code, "co_qualname", frame.f_code.co_name)) in IDLE_FRAMES
+
+
+def _safe_name(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text).strip("_")[:80]
+
+
+class SamplingProfiler:
+    """Record every thread's Python stack at a fixed interval for a while.
+
+    Nothing is traced between samples, so the cost is fixed per interval no
+    matter how much code runs, which makes it safe to switch on in
+    production. The result is a collapsed-stack file (`frame;frame;... count`)
+    that flamegraph.pl, speedscope or inferno can render directly.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.current: Optional[dict] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval: float = 0.005, include_idle: bool = False) -> str:
+        """Start a run in the background and return the file it will write"""
+        with self._lock:
+            if self.running:
+                raise RuntimeError("A sampling run is already in progress")
+
+            os.makedirs(self.directory, exist_ok=True)
+            name = f"sample-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.collapsed"
+            path = os.path.join(self.directory, name)
+            self._stop.clear()
+            self.current = {
+                "file": name,
+                "started_at": time.time(),
+                "seconds": seconds,
+                "interval": interval,
+            }
+            self._thread = threading.Thread(
+                target=self._run, args=(path, seconds, interval, include_idle),
+                name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+        logger.info(f"Sampling profiler started for {seconds}s, writing {name}")
+        return name
+
+    def stop(self):
+        """End the current run early; what was sampled so far is still written"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, path: str, seconds: float, interval: float, include_idle: bool):
+        counts: Counter = Counter()
+        me = threading.get_ident()
+        names = {}
+        samples = 0
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline and not self._stop.is_set():
+            frames = sys._current_frames()
+            if any(ident not in names for ident in frames):
+                names = {thread.ident: _safe_name(thread.name) for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == me or (not include_idle and _is_idle(frame)):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, "thread"))
+                counts[";".join(reversed(stack))] += 1
+            samples += 1
+            self._stop.wait(interval)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp_path, path)
+        self.current = dict(self.current or {}, samples=samples, finished_at=time.time())
+        logger.info(f"Sampling profiler wrote {samples} samples to {os.path.basename(path)}")
+
+
+def save_request_profile(directory: str, profile: cProfile.Profile, method: str, path: str) -> str:
+    """Write a request's cProfile stats as a pstats file and return its name"""
+    os.makedirs(directory, exist_ok=True)
+    name = f"request-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{method}-{_safe_name(path)}.pstats"
+    profile.dump_stats(os.path.join(directory, name))
+    return name
+
+
+def _profiled(call: Callable[..., Any]) -> Callable[..., Any]:
+    """Run an endpoint under the request's profiler in whichever thread it runs in"""
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def wrapper(*args, **kwargs):
+            profile = request_profile_var.get()
+            if profile is None:
+                return await call(*args, **kwargs)
+            # Other tasks that run while this one awaits are recorded too
+            with _enabled(profile):
+                return await call(*args, **kwargs)
+    else:
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            profile = request_profile_var.get()
+            if profile is None:
+                return call(*args, **kwargs)
+            with _enabled(profile):
+                return call(*args, **kwargs)
+    return wrapper
+
+
+@contextlib.contextmanager
+def _enabled(profile: cProfile.Profile):
+    """Enable a profiler for a block unless another profiler owns this thread"""
+    try:
+        profile.enable()
+    except ValueError:
+        logger.warning("Skipped request profile: another profiler is active on this thread")
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+
+
+class ProfiledRoute(APIRoute):
+    """Route whose endpoint runs under the request's profiler, if it has one.
+
+    Sync endpoints run in the threadpool, where a profiler enabled by the
+    middleware would not see them, so the endpoint itself is wrapped; the
+    request's profiler reaches the worker thread through a context var.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        if not getattr(endpoint, "__profiled__", False):
+            endpoint = _profiled(endpoint)
+            endpoint.__profiled__ = True
+        super().__init__(path, endpoint, **kwargs)
+
+
+def list_profiles(directory: str) -> List[dict]:
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if name.endswith((".collapsed", ".pstats")):
+            stat = os.stat(os.path.join(directory, name))
+            profiles.append({"file": name, "size": stat.st_size, "modified": stat.st_mtime})
+    profiles.sort(key=lambda p: p["modified"], reverse=True)
+    return profiles
@@ -0,0 +1,173 @@
+import math
+import threading
+from abc import ABC, abstractmethod
+import time
+from typing import Dict, List, Optional, Tuple
+
+# (method or "*", path prefix, cost); first match wins
+ROUTE_COSTS: List[Tuple[str, str, float]] = [
+    ("GET", "/api/buildings/image/", 5.0),
+    ("GET", "/api/buildings/sprite/", 5.0),
+    # One connection stays open for a long time; reconnect storms should cost
+    ("GET", "/api/buildings/changes", 5.0),
+    ("GET", "/api/offline/", 5.0),
+    ("POST", "/api/offline/build", 50.0),
+    ("POST", "/api/navigation/", 5.0),
+    ("POST", "/api/buildings/", 25.0),
+    ("PUT", "/api/", 25.0),
+    ("PATCH", "/api/", 25.0),
+    ("DELETE", "/api/", 10.0),
+    ("*", "/", 1.0),
+]
+
+
+def route_cost(method: str, path: str) -> float:
+    """Token cost of a request: cheap reads, pricier image reads, expensive uploads"""
+    for route_method, prefix, cost in ROUTE_COSTS:
+        if (route_method == "*" or route_method == method) and path.startswith(prefix):
+            return cost
+    return 1.0
+
+
+def client_address(peer: Optional[str], forwarded: Optional[str], proxy_hops: int) -> str:
+    """Address to limit on when behind proxy_hops trusted proxies.
+
+    Each proxy appends the address it received the request from, so the
+    client is proxy_hops entries from the right; anything further left was
+    sent by the client and cannot be trusted.
+    """
+    if forwarded and proxy_hops > 0:
+        entries = [entry.strip() for entry in forwarded.split(",")]
+        if len(entries) >= proxy_hops and entries[-proxy_hops]:
+            return entries[-proxy_hops]
+    return peer or "unknown"
+
+
+class Decision:
+    __slots__ = ("allowed", "remaining", "retry_after", "reset_after")
+
+    def __init__(self, allowed: bool, remaining: float, retry_after: float, reset_after: float):
+        self.allowed = allowed
+        self.remaining = remaining
+        self.retry_after = retry_after
+        self.reset_after = reset_after
+
+
+def _decide(tokens: float, cost: float, capacity: float, refill_rate: float) -> Tuple[float, Decision]:
+    """Apply a request to a refilled bucket; returns (tokens_left, decision)"""
+    allowed = tokens >= cost
+    if allowed:
+        tokens -= cost
+    retry_after = 0.0 if allowed else (cost - tokens) / refill_rate
+    reset_after = (capacity - tokens) / refill_rate
+    return tokens, Decision(allowed, tokens, retry_after, reset_after)
+
+
+class RateLimitBackend(ABC):
+    """Where bucket state lives"""
+
+    @abstractmethod
+    async def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> Decision:
+        """Refill the key's bucket, spend cost tokens if it can, and return the decision"""
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+    """Buckets held in this process; limits apply per worker"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    async def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> Decision:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now, capacity, refill_rate)
+                bucket = self._buckets[key] = [capacity, now]
+
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+            tokens, decision = _decide(tokens, cost, capacity, refill_rate)
+            bucket[0] = tokens
+            bucket[1] = now
+        return decision
+
+    def _prune(self, now: float, capacity: float, refill_rate: float):
+        # Buckets that have refilled completely carry no state worth keeping
+        full_after = capacity / refill_rate
+        for key in [k for k, (_, updated) in self._buckets.items() if now - updated >= full_after]:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            self._buckets.clear()
+
+
+# Refill, spend and store a bucket atomically inside Redis
+_REDIS_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets shared by every worker through Redis (needs the redis package)"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed")
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_SCRIPT)
+
+    async def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> Decision:
+        allowed, tokens = await self._script(
+            keys=[self.prefix + key], args=[capacity, refill_rate, cost, time.time()]
+        )
+        tokens = float(tokens)
+        allowed = bool(int(allowed))
+        retry_after = 0.0 if allowed else (cost - tokens) / refill_rate
+        return Decision(allowed, tokens, retry_after, (capacity - tokens) / refill_rate)
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, capacity: float, refill_rate: float):
+        self.backend = backend
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+
+    async def check(self, client: str, method: str, path: str) -> Decision:
+        cost = min(route_cost(method, path), self.capacity)
+        return await self.backend.consume(client, cost, self.capacity, self.refill_rate)
+
+    def headers(self, decision: Decision) -> Dict[str, str]:
+        """Standard rate limit headers (IETF RateLimit draft plus Retry-After)"""
+        headers = {
+            "RateLimit-Limit": str(int(self.capacity)),
+            "RateLimit-Remaining": str(int(decision.remaining)),
+            "RateLimit-Reset": str(math.ceil(decision.reset_after)),
+        }
+        if not decision.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(decision.retry_after)))
+        return headers
+
+
+def create_rate_limiter(capacity: float, refill_rate: float, redis_url: Optional[str] = None) -> RateLimiter:
+    backend = RedisRateLimitBackend(redis_url) if redis_url else LocalRateLimitBackend()
+    return RateLimiter(backend, capacity, refill_rate)
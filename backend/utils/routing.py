@@ -0,0 +1,265 @@
+import heapq
+import math
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from backend.utils.geo_utils import CoordinateTable, haversine, haversine_matrix
+
+# Number of nearest buildings each building is linked to in the walk graph
+GRAPH_NEIGHBOURS = 4
+# Distance from the active path after which a session is rerouted
+OFF_ROUTE_M = 30.0
+# Distance at which a waypoint counts as reached
+WAYPOINT_RADIUS_M = 12.0
+# How much further than the nearest node an entry node may be
+ENTRY_SLACK_M = 60.0
+# Segments shorter than this have no meaningful bearing
+MIN_BEARING_M = 1.0
+
+
+class WalkGraph:
+    """Walking network linking every building to its nearest neighbours.
+
+    There is no path data for the campus yet, so edges are straight lines
+    between nearby buildings weighted by great-circle distance.
+    """
+
+    def __init__(self, table: CoordinateTable, names: Dict[str, str], neighbours: int = GRAPH_NEIGHBOURS):
+        self.table = table
+        self.names = names
+        self.adjacency: List[Dict[int, float]] = [{} for _ in range(len(table))]
+
+        count = len(table)
+        k = min(neighbours, count - 1)
+        if k <= 0:
+            return
+
+        # Row chunks keep memory linear in the number of buildings
+        for start in range(0, count, 256):
+            stop = min(start + 256, count)
+            dist = haversine_matrix(table.lat[start:stop], table.lng[start:stop], table.lat, table.lng)
+            dist[np.arange(stop - start), np.arange(start, stop)] = np.inf
+            nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            for row, columns in enumerate(nearest):
+                i = start + row
+                for j in columns:
+                    weight = float(dist[row, j])
+                    self.adjacency[i][int(j)] = weight
+                    self.adjacency[int(j)][i] = weight
+
+    def __len__(self) -> int:
+        return len(self.adjacency)
+
+    def point(self, node: int) -> Tuple[float, float]:
+        return math.degrees(self.table.lat[node]), math.degrees(self.table.lng[node])
+
+    def shortest_path_tree(self, target: int) -> "ShortestPathTree":
+        """Run Dijkstra outward from the target so every node knows its way there"""
+        distance = np.full(len(self), np.inf)
+        next_hop = np.full(len(self), -1, dtype=np.int64)
+        distance[target] = 0.0
+
+        heap = [(0.0, target)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > distance[node]:
+                continue
+            for neighbour, weight in self.adjacency[node].items():
+                candidate = d + weight
+                if candidate < distance[neighbour]:
+                    distance[neighbour] = candidate
+                    next_hop[neighbour] = node
+                    heapq.heappush(heap, (candidate, neighbour))
+
+        return ShortestPathTree(self, target, distance, next_hop)
+
+
+class ShortestPathTree:
+    """Distances and next hops from every node toward one destination"""
+
+    def __init__(self, graph: WalkGraph, target: int, distance: np.ndarray, next_hop: np.ndarray):
+        self.graph = graph
+        self.target = target
+        self.distance = distance
+        self.next_hop = next_hop
+
+    def entry_node(self, lat: float, lng: float) -> Optional[int]:
+        """Snap a position to the nearby node with the shortest total walk to the destination.
+
+        The nearest node alone can lie behind the user. Candidates are kept
+        within ENTRY_SLACK_M of the nearest one: edges are straight lines, so
+        over all nodes the sum would favour cutting across to the destination.
+        """
+        table = self.graph.table
+        approach = haversine_matrix(
+            np.radians([lat]), np.radians([lng]), table.lat, table.lng
+        )[0]
+        approach[~np.isfinite(self.distance)] = np.inf
+        nearest = approach.min() if len(approach) else np.inf
+        if not np.isfinite(nearest):
+            return None
+        total = np.where(approach <= nearest + ENTRY_SLACK_M, approach + self.distance, np.inf)
+        return int(np.argmin(total))
+
+    def path_from(self, node: int) -> List[int]:
+        path = [node]
+        while node != self.target:
+            node = int(self.next_hop[node])
+            path.append(node)
+        return path
+
+
+def _bearing(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dlmb = math.radians(lng2 - lng1)
+    y = math.sin(dlmb) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlmb)
+    return (math.degrees(math.atan2(y, x)) + 360.0) % 360.0
+
+
+def _turn(previous_bearing: Optional[float], bearing: float) -> str:
+    if previous_bearing is None:
+        return "depart"
+    delta = (bearing - previous_bearing + 540.0) % 360.0 - 180.0
+    if abs(delta) < 30:
+        return "straight"
+    if abs(delta) > 150:
+        return "u-turn"
+    return "right" if delta > 0 else "left"
+
+
+def _distance_to_segment(lat: float, lng: float, a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Approximate distance in metres from a point to a short segment"""
+    scale_x = math.cos(math.radians(lat)) * 111320.0
+    scale_y = 110540.0
+    ax, ay = (a[1] - lng) * scale_x, (a[0] - lat) * scale_y
+    bx, by = (b[1] - lng) * scale_x, (b[0] - lat) * scale_y
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / length))
+    px, py = ax + t * dx, ay + t * dy
+    return math.hypot(px, py)
+
+
+class NavigationSession:
+    """Progress of one user along a route to a destination building.
+
+    The shortest-path tree is computed once per destination; leaving the path
+    only re-reads it from the user's new position instead of searching again.
+    """
+
+    def __init__(self, graph: WalkGraph, destination: str):
+        self.destination = destination
+        self.graph = graph
+        self.tree = graph.shortest_path_tree(graph.table.positions[destination])
+        # Waypoints are (lat, lng, node); the first is where the route started
+        self.waypoints: List[Tuple[float, float, Optional[int]]] = []
+        self.next_index = 0
+        # First waypoint headed for after the last start or reroute
+        self.first_index: Optional[int] = None
+        self.arrived = False
+
+    def start(self, lat: float, lng: float) -> Optional[dict]:
+        """Plan the route from a position; returns None if the destination is unreachable"""
+        node = self.tree.entry_node(lat, lng)
+        if node is None:
+            return None
+        self.waypoints = [(lat, lng, None)] + [
+            (*self.graph.point(n), n) for n in self.tree.path_from(node)
+        ]
+        self.next_index = 1
+        self.first_index = None
+        return self._advance(lat, lng)
+
+    def update(self, lat: float, lng: float) -> Tuple[Optional[dict], bool]:
+        """Apply a position fix.
+
+        Returns (message, rerouted); message is None when nothing the client
+        shows has changed.
+        """
+        if self.arrived:
+            return None, False
+
+        # Nearest segment from the one being walked onward
+        first = max(1, self.next_index)
+        best_index = first
+        best_distance = math.inf
+        for i in range(first, len(self.waypoints)):
+            a = self.waypoints[i - 1][:2]
+            b = self.waypoints[i][:2]
+            d = _distance_to_segment(lat, lng, a, b)
+            if d < best_distance:
+                best_distance = d
+                best_index = i
+
+        if best_distance > OFF_ROUTE_M:
+            return self.start(lat, lng), True
+
+        previous = self.next_index
+        self.next_index = best_index
+        message = self._advance(lat, lng)
+        if self.next_index == previous and not self.arrived:
+            return None, False
+        return message, False
+
+    def _advance(self, lat: float, lng: float) -> dict:
+        # Skip waypoints the user is already standing at
+        while self.next_index < len(self.waypoints):
+            target = self.waypoints[self.next_index]
+            if haversine(lat, lng, target[0], target[1]) > WAYPOINT_RADIUS_M:
+                break
+            self.next_index += 1
+        if self.first_index is None:
+            self.first_index = self.next_index
+
+        if self.next_index >= len(self.waypoints):
+            self.arrived = True
+            return {"type": "arrived", "destination": self.destination}
+
+        return {
+            "type": "instruction",
+            "remaining_m": round(self.remaining_distance(lat, lng)),
+            "steps": self.steps(lat, lng, limit=2),
+        }
+
+    def remaining_distance(self, lat: float, lng: float) -> float:
+        target = self.waypoints[self.next_index]
+        node = target[2]
+        return haversine(lat, lng, target[0], target[1]) + float(self.tree.distance[node])
+
+    def steps(self, lat: float, lng: float, limit: int) -> List[dict]:
+        """Describe the next waypoints, starting with the one being walked to"""
+        steps = []
+        # The heading so far comes from the last segment walked between two route
+        # nodes since the last start; the start fix itself is not a node
+        previous_bearing = None
+        walked_from = self.next_index - 2
+        if walked_from >= max(1, self.first_index - 1):
+            a = self.waypoints[walked_from]
+            b = self.waypoints[walked_from + 1]
+            if haversine(a[0], a[1], b[0], b[1]) >= MIN_BEARING_M:
+                previous_bearing = _bearing(a[0], a[1], b[0], b[1])
+
+        origin = (lat, lng)
+        for i in range(self.next_index, min(len(self.waypoints), self.next_index + limit)):
+            target_lat, target_lng, node = self.waypoints[i]
+            distance = haversine(origin[0], origin[1], target_lat, target_lng)
+            if distance < MIN_BEARING_M and previous_bearing is not None:
+                # Same spot as the last waypoint: keep the heading
+                bearing = previous_bearing
+            else:
+                bearing = _bearing(origin[0], origin[1], target_lat, target_lng)
+            slug = self.graph.table.slugs[node]
+            steps.append({
+                "slug": slug,
+                "name": self.graph.names.get(slug, slug),
+                "lat": target_lat,
+                "lng": target_lng,
+                "distance_m": round(distance),
+                "bearing": round(bearing),
+                "turn": _turn(previous_bearing, bearing),
+            })
+            if distance >= MIN_BEARING_M:
+                previous_bearing = bearing
+            origin = (target_lat, target_lng)
+        return steps
@@ -0,0 +1,35 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Optional
+from fastapi.concurrency import run_in_threadpool
+
+
+class SingleFlight:
+    """Collapse concurrent identical calls into one in-flight call.
+
+    The first caller for a key runs the blocking function in the threadpool;
+    callers arriving while it runs await the same result, including any
+    exception it raises. Each caller applies its own timeout without
+    cancelling the shared call.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._run(key, fn))
+            # Mark the exception retrieved even if every waiter timed out
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._calls[key] = task
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        try:
+            return await run_in_threadpool(fn)
+        finally:
+            # Later callers start a fresh call instead of reusing a finished one
+            self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
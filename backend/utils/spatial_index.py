@@ -0,0 +1,116 @@
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# (min_x, min_y, max_x, max_y)
+BBox = Tuple[float, float, float, float]
+# A ring is a list of [x, y] positions; a polygon is an outer ring followed by holes
+Ring = Sequence[Sequence[float]]
+
+
+def ring_bbox(ring: Ring) -> BBox:
+    xs = [p[0] for p in ring]
+    ys = [p[1] for p in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _point_in_ring(x: float, y: float, ring: Ring) -> bool:
+    """Even-odd ray casting test"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def point_in_polygon(x: float, y: float, polygon: Sequence[Ring]) -> bool:
+    """Return True if the point is inside the outer ring and outside every hole"""
+    if not polygon or not _point_in_ring(x, y, polygon[0]):
+        return False
+    return not any(_point_in_ring(x, y, hole) for hole in polygon[1:])
+
+
+def _union(boxes: Iterable[BBox]) -> BBox:
+    min_x = min_y = math.inf
+    max_x = max_y = -math.inf
+    for bx0, by0, bx1, by1 in boxes:
+        min_x = min(min_x, bx0)
+        min_y = min(min_y, by0)
+        max_x = max(max_x, bx1)
+        max_y = max(max_y, by1)
+    return min_x, min_y, max_x, max_y
+
+
+class STRTree:
+    """Static R-tree bulk-loaded with Sort-Tile-Recursive packing.
+
+    Items are (bbox, value) pairs. The tree is immutable; rebuild it when the
+    items change. Queries return the values whose boxes contain a point.
+    """
+
+    def __init__(self, items: Sequence[Tuple[BBox, object]], node_capacity: int = 16):
+        self.node_capacity = node_capacity
+        self.size = len(items)
+        # Each node is (bbox, children, is_leaf); leaf children are values
+        self.root: Optional[tuple] = None
+
+        level = [(bbox, value, True) for bbox, value in items]
+        if not level:
+            return
+
+        leaf = True
+        while True:
+            level = self._pack(level, leaf)
+            leaf = False
+            if len(level) == 1:
+                break
+        self.root = level[0]
+
+    def _pack(self, entries: list, leaf: bool) -> list:
+        """Group entries into parent nodes, tiling by x then by y"""
+        capacity = self.node_capacity
+        node_count = math.ceil(len(entries) / capacity)
+        slice_count = math.ceil(math.sqrt(node_count))
+        slice_size = slice_count * capacity
+
+        def center_x(entry):
+            return entry[0][0] + entry[0][2]
+
+        def center_y(entry):
+            return entry[0][1] + entry[0][3]
+
+        entries = sorted(entries, key=center_x)
+        nodes = []
+        for start in range(0, len(entries), slice_size):
+            vertical = sorted(entries[start:start + slice_size], key=center_y)
+            for offset in range(0, len(vertical), capacity):
+                group = vertical[offset:offset + capacity]
+                bbox = _union(entry[0] for entry in group)
+                if leaf:
+                    children = [(entry[0], entry[1]) for entry in group]
+                else:
+                    children = group
+                nodes.append((bbox, children, leaf))
+        return nodes
+
+    def query_point(self, x: float, y: float) -> List[object]:
+        """Return values of all items whose bounding box contains the point"""
+        if self.root is None:
+            return []
+
+        result = []
+        stack = [self.root]
+        while stack:
+            (min_x, min_y, max_x, max_y), children, leaf = stack.pop()
+            if x < min_x or x > max_x or y < min_y or y > max_y:
+                continue
+            if leaf:
+                for (bx0, by0, bx1, by1), value in children:
+                    if bx0 <= x <= bx1 and by0 <= y <= by1:
+                        result.append(value)
+            else:
+                stack.extend(children)
+        return result
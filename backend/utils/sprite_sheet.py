@@ -0,0 +1,78 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from backend.utils.image_utils import make_sprite, make_thumbnail
+
+# Cell size of one thumbnail in a sheet, in pixels
+SPRITE_TILE_SIZE = 128
+SPRITE_COLUMNS = 10
+# Most buildings packed into one sheet
+MAX_SPRITE_TILES = 100
+
+
+class SpriteSheets:
+    """Thumbnail sprite sheets for pages of buildings.
+
+    Thumbnails are kept per building until its image key changes, so a
+    sheet is recomposed from cached tiles and only changed images are read
+    and decoded again. The key must change whenever the image bytes do (the
+    routes use the file name and row version, since the re-encode job keeps
+    file names). Sheets are named by the keys they contain, which lets any
+    worker rebuild the same sheet for the same name.
+    """
+
+    def __init__(self, tile_size: int = SPRITE_TILE_SIZE, columns: int = SPRITE_COLUMNS, max_sheets: int = 64):
+        self.tile_size = tile_size
+        self.columns = columns
+        self.max_sheets = max_sheets
+        self._lock = threading.Lock()
+        # slug -> (image key, JPEG thumbnail)
+        self._thumbnails: Dict[str, Tuple[str, bytes]] = {}
+        # sheet id -> (JPEG sheet, offsets, size), least recently used first
+        self._sheets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def stale(self, images: Dict[str, str]) -> List[str]:
+        """Slugs whose cached thumbnail is missing or made from an older image"""
+        return [slug for slug, key in images.items() if self._thumbnails.get(slug, (None,))[0] != key]
+
+    def add_thumbnail(self, slug: str, key: str, image_data: bytes):
+        self._thumbnails[slug] = (key, make_thumbnail(image_data, max_size=self.tile_size))
+
+    def discard(self, slug: str):
+        self._thumbnails.pop(slug, None)
+
+    def sheet(self, slugs: List[str], images: Dict[str, str]) -> dict:
+        """Manifest of the sheet holding the given buildings' thumbnails, in order"""
+        tiles = [slug for slug in slugs if slug in images and slug in self._thumbnails]
+        key = "|".join(f"{slug}:{self._thumbnails[slug][0]}" for slug in tiles)
+        sheet_id = hashlib.sha1(f"{self.tile_size}:{self.columns}|{key}".encode("utf-8")).hexdigest()[:20]
+
+        with self._lock:
+            entry = self._sheets.get(sheet_id)
+            if entry is not None:
+                self._sheets.move_to_end(sheet_id)
+        if entry is None and tiles:
+            entry = make_sprite([self._thumbnails[slug][1] for slug in tiles], self.tile_size, self.columns)
+            with self._lock:
+                self._sheets[sheet_id] = entry
+                while len(self._sheets) > self.max_sheets:
+                    self._sheets.popitem(last=False)
+
+        if entry is None:
+            return {"id": None, "width": 0, "height": 0, "tiles": {}}
+        _, offsets, (width, height) = entry
+        return {
+            "id": sheet_id,
+            "width": width,
+            "height": height,
+            "tiles": {
+                slug: {"x": x, "y": y, "w": w, "h": h}
+                for slug, (x, y, w, h) in zip(tiles, offsets)
+            }
+        }
+
+    def image(self, sheet_id: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._sheets.get(sheet_id)
+        return entry[0] if entry is not None else None
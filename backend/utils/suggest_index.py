@@ -0,0 +1,131 @@
+import bisect
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from backend.utils.facility_index import normalize_term
+
+# Upper bound on index entries looked at per query, so one-letter prefixes stay cheap
+MAX_SCAN = 2000
+
+
+def _word_starts(text: str) -> List[str]:
+    """Every suffix of a normalised term that starts at a word, so "lab" finds "Computer Labs" """
+    words = text.split(" ")
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class SuggestIndex:
+    """Sorted-array prefix index over building names, slugs, departments and facilities.
+
+    Keys are kept in one sorted list, so a prefix lookup is a binary search
+    followed by a short forward scan. Buildings can be added, changed or
+    removed one at a time without rebuilding the whole index.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        # key -> {(kind, label)}; a key may point at several terms
+        self._postings: Dict[str, Set[Tuple[str, str]]] = {}
+        # (kind, label) -> slugs having that term
+        self._terms: Dict[Tuple[str, str], Set[str]] = {}
+        # slug -> terms it contributes, for incremental updates
+        self._building_terms: Dict[str, List[Tuple[str, str]]] = {}
+        self._names: Dict[str, str] = {}
+        self.popularity: Counter = Counter()
+
+    def build(self, rows: Iterable[Tuple[str, str, str, Optional[List[str]]]]):
+        for slug, name, department, facilities in rows:
+            self.upsert(slug, name, department, facilities)
+
+    def _add_key(self, key: str, term: Tuple[str, str]):
+        postings = self._postings.get(key)
+        if postings is None:
+            bisect.insort(self._keys, key)
+            postings = self._postings[key] = set()
+        postings.add(term)
+
+    def _remove_key(self, key: str, term: Tuple[str, str]):
+        postings = self._postings.get(key)
+        if postings is None:
+            return
+        postings.discard(term)
+        if not postings:
+            del self._postings[key]
+            i = bisect.bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+    def upsert(self, slug: str, name: str, department: str, facilities: Optional[List[str]]):
+        terms = [("building", slug)]
+        if department:
+            terms.append(("department", department))
+        for facility in facilities or []:
+            if facility.strip():
+                terms.append(("facility", facility))
+
+        with self._lock:
+            self._remove_locked(slug)
+            self._names[slug] = name
+            self._building_terms[slug] = terms
+            for term in terms:
+                slugs = self._terms.setdefault(term, set())
+                slugs.add(slug)
+                if len(slugs) > 1:
+                    continue
+                texts = [name, slug] if term[0] == "building" else [term[1]]
+                for text in texts:
+                    for key in _word_starts(normalize_term(text)):
+                        self._add_key(key, term)
+
+    def remove(self, slug: str):
+        with self._lock:
+            self._remove_locked(slug)
+
+    def _remove_locked(self, slug: str):
+        terms = self._building_terms.pop(slug, None)
+        if terms is None:
+            return
+        name = self._names.pop(slug, slug)
+        for term in terms:
+            slugs = self._terms.get(term)
+            if slugs is None:
+                continue
+            slugs.discard(slug)
+            if slugs:
+                continue
+            del self._terms[term]
+            texts = [name, slug] if term[0] == "building" else [term[1]]
+            for text in texts:
+                for key in _word_starts(normalize_term(text)):
+                    self._remove_key(key, term)
+
+    def record_view(self, slug: str):
+        self.popularity[slug] += 1
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        prefix = normalize_term(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            matches = set()
+            i = bisect.bisect_left(self._keys, prefix)
+            end = min(len(self._keys), i + MAX_SCAN)
+            while i < end and self._keys[i].startswith(prefix):
+                matches.update(self._postings[self._keys[i]])
+                i += 1
+
+            results = []
+            for kind, label in matches:
+                slugs = self._terms[(kind, label)]
+                score = sum(self.popularity[slug] for slug in slugs)
+                if kind == "building":
+                    item = {"type": kind, "label": self._names.get(label, label), "slug": label}
+                else:
+                    item = {"type": kind, "label": label, "count": len(slugs)}
+                    score += len(slugs)
+                results.append((score, item))
+
+        results.sort(key=lambda r: (-r[0], len(r[1]["label"]), r[1]["label"]))
+        return [item for _, item in results[:limit]]
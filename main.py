@@ -1,21 +1,33 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from backend import seed_data
 from fastapi.staticfiles import StaticFiles
 from backend.database.config import init_database, test_database_connection
-from backend.routes import building
+from backend.routes import admin, building, indoor, map_layer, navigation, offline
+from backend.core.admin import is_admin_token
 from backend.core.config import settings
+from backend.core.logging_config import ACCESS_LOGGER, request_id_var, setup_logging, stop_logging
+from backend.catalog_snapshot import publish_snapshot, snapshot
+from backend.utils.profiling import request_profile_var, save_request_profile
+from backend.utils.rate_limit import client_address, create_rate_limiter
+import cProfile
 import logging
 import os
+import time
+import uuid
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG if settings.DEBUG else logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('app.log')
-    ]
+# Configure logging; records are written by a background thread
+setup_logging(
+    level=logging.getLevelName(settings.LOG_LEVEL.upper()) if settings.LOG_LEVEL
+    else (logging.DEBUG if settings.DEBUG else logging.INFO),
+    log_file=settings.LOG_FILE,
+    max_bytes=settings.LOG_MAX_BYTES,
+    backup_count=settings.LOG_BACKUP_COUNT,
+    json_logs=settings.LOG_JSON,
+    access_sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    access_slow_ms=settings.ACCESS_LOG_SLOW_MS
 )
 
 logger = logging.getLogger(__name__)
@@ -29,25 +41,125 @@ def create_application() -> FastAPI:
         version="0.1.0",
     )
     
-    # Add CORS middleware
+    # Create static directories
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    STATIC_DIR = os.path.join(BASE_DIR, "static")
+    os.makedirs(os.path.join(STATIC_DIR, "images", "buildings"), exist_ok=True)
+    
+    # Mount static files
+    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+    
+    # Pick up catalog snapshots published by other workers
+    @app.middleware("http")
+    async def attach_catalog_snapshot(request, call_next):
+        try:
+            snapshot.refresh()
+        except Exception as e:
+            logger.error(f"Could not attach catalog snapshot: {e}")
+        return await call_next(request)
+    
+    # cProfile capture for requests sent with X-Profile and a valid X-Admin-Token.
+    # Added before the rate limiter so it runs inside it: rejected requests write no file.
+    if settings.ADMIN_TOKEN is not None:
+        @app.middleware("http")
+        async def profile_requests(request, call_next):
+            if "x-profile" not in request.headers or not is_admin_token(request.headers.get("x-admin-token")):
+                return await call_next(request)
+
+            profile = cProfile.Profile()
+            token = request_profile_var.set(profile)
+            try:
+                response = await call_next(request)
+            finally:
+                request_profile_var.reset(token)
+            name = await run_in_threadpool(
+                save_request_profile, settings.PROFILE_DIR, profile, request.method, request.url.path
+            )
+            response.headers["X-Profile-File"] = name
+            return response
+    
+    # Token-bucket rate limiting per client
+    if settings.RATE_LIMIT_ENABLED:
+        limiter = create_rate_limiter(
+            settings.RATE_LIMIT_CAPACITY,
+            settings.RATE_LIMIT_REFILL_RATE,
+            settings.RATE_LIMIT_REDIS_URL
+        )
+
+        @app.middleware("http")
+        async def rate_limit(request, call_next):
+            # CORS preflights are free
+            if request.method == "OPTIONS":
+                return await call_next(request)
+
+            client = client_address(
+                request.client.host if request.client else None,
+                request.headers.get("x-forwarded-for") if settings.RATE_LIMIT_TRUST_FORWARDED else None,
+                settings.RATE_LIMIT_PROXY_HOPS
+            )
+
+            try:
+                decision = await limiter.check(client, request.method, request.url.path)
+            except Exception as e:
+                # Fail open: a broken limiter backend must not take the API down
+                logger.error(f"Rate limiter unavailable: {e}")
+                return await call_next(request)
+
+            headers = limiter.headers(decision)
+            if not decision.allowed:
+                return JSONResponse(
+                    status_code=429,
+                    content={"detail": "Too many requests"},
+                    headers=headers
+                )
+            response = await call_next(request)
+            response.headers.update(headers)
+            return response
+
+    # Added after the rate limiter so it wraps it and 429s carry CORS headers too
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],  # Allows all origins in development
         allow_credentials=True,
         allow_methods=["*"],  # Allows all methods
         allow_headers=["*"],  # Allows all headers
+        expose_headers=["RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After"],
     )
     
-    # Create static directories
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    STATIC_DIR = os.path.join(BASE_DIR, "static")
-    os.makedirs(os.path.join(STATIC_DIR, "images", "buildings"), exist_ok=True)
-    
-    # Mount static files
-    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+    # Request IDs and sampled access records; added last so it wraps everything
+    access_logger = logging.getLogger(ACCESS_LOGGER)
+
+    @app.middleware("http")
+    async def log_requests(request, call_next):
+        request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Request-ID"] = request_id
+            return response
+        finally:
+            access_logger.info(
+                f"{request.method} {request.url.path} {status}",
+                extra={
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "client": request.client.host if request.client else None,
+                }
+            )
+            request_id_var.reset(token)
     
     # Include the API routes
     app.include_router(building.router, prefix="/api", tags=["buildings"])
+    app.include_router(indoor.router, prefix="/api", tags=["indoor"])
+    app.include_router(map_layer.router, prefix="/api", tags=["map"])
+    app.include_router(navigation.router, prefix="/api", tags=["navigation"])
+    app.include_router(offline.router, prefix="/api", tags=["offline"])
+    app.include_router(admin.router, prefix="/api", tags=["admin"])
     
     return app
 
@@ -72,12 +184,17 @@ async def startup_event():
         logger.info("Database seeded successfully")
     except Exception as e:
         logger.error(f"Error seeding database: {e}")
+    try:
+        publish_snapshot()
+    except Exception as e:
+        logger.error(f"Error publishing catalog snapshot: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on application shutdown"""
     try:
         logger.info("Application shutdown complete")
+        stop_logging()
     except Exception as e:
         logger.error(f"Application shutdown failed: {e}")
         raise
@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+
+# Settings are read when the app is imported, so the environment is set first.
+# TEST_DATABASE_URL points the suite at PostgreSQL; by default it runs on SQLite.
+_tmp = tempfile.mkdtemp(prefix="navigation-tests-")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["CATALOG_SNAPSHOT_PATH"] = ""
+os.environ["CHANGE_FEED_PATH"] = ""
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["LOG_FILE"] = ""
+os.environ["PROFILE_DIR"] = os.path.join(_tmp, "profiles")
+os.environ["OFFLINE_BUNDLE_DIR"] = os.path.join(_tmp, "offline_bundles")
+os.environ.pop("ADMIN_TOKEN", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import JSON, event
+from backend.database.base import Base, SessionLocal, engine
+from backend.database.models.building import Building
+
+if engine.dialect.name != "postgresql":
+    # ARRAY columns only exist in PostgreSQL
+    Building.__table__.c.facilities.type = JSON()
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _use_wal(dbapi_connection, connection_record):
+        # Lets a streaming read stay open while another connection commits, as in PostgreSQL
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+import main
+from backend.core.config import settings
+from backend.utils.catalog import bump_catalog_version
+
+
+@pytest.fixture(autouse=True)
+def database():
+    """Fresh tables for every test, with no catalog caches left from the last one"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    bump_catalog_version(notify=False)
+    yield
+    bump_catalog_version(notify=False)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    """Client for a new app built with some settings changed"""
+    def make(**overrides) -> TestClient:
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        return TestClient(main.create_application())
+    return make
+
+
+@pytest.fixture
+def add_building(db):
+    """Insert a building directly, bypassing the routes and their listeners"""
+    def add(slug: str, **fields) -> Building:
+        values = {
+            "id": slug,
+            "slug": slug,
+            "name": slug.replace("-", " ").title(),
+            "department": "School of Science",
+            "description": "",
+            "facilities": [],
+            "coordinates": {"lat": 6.5, "lng": 3.37},
+        }
+        values.update(fields)
+        building = Building(**values)
+        db.add(building)
+        db.commit()
+        bump_catalog_version(notify=False)
+        return building
+    return add
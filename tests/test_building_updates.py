@@ -0,0 +1,121 @@
+import pytest
+from backend.change_feed import feed
+
+
+@pytest.fixture
+def buildings(add_building):
+    add_building("library", department="Library")
+    add_building("sci", name="Sci")
+
+
+def _patch(client, *updates, atomic=False):
+    return client.patch("/api/buildings", json={"atomic": atomic, "updates": list(updates)})
+
+
+def test_patch_updates_and_bumps_version(client, buildings):
+    response = _patch(client, {"slug": "library", "version": 1, "department": "Humanities"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["updated"] == 1
+    assert body["results"][0]["building"]["department"] == "Humanities"
+    assert body["results"][0]["building"]["version"] == 2
+    assert client.get("/api/library").json()["version"] == 2
+
+
+def test_patch_reports_version_conflicts(client, buildings):
+    response = _patch(
+        client,
+        {"slug": "library", "version": 5, "department": "Humanities"},
+        {"slug": "sci", "version": 1, "description": "Labs"},
+        {"slug": "missing", "version": 1, "description": "Gone"},
+    )
+
+    body = response.json()
+    assert response.status_code == 200
+    assert (body["updated"], body["conflicts"], body["not_found"]) == (1, 1, 1)
+    assert body["results"][0] == {"slug": "library", "status": "conflict", "current_version": 1}
+    assert client.get("/api/sci").json()["description"] == "Labs"
+
+
+def test_atomic_patch_conflict_rolls_back(client, buildings):
+    response = _patch(
+        client,
+        {"slug": "sci", "version": 1, "description": "Labs"},
+        {"slug": "library", "version": 5, "department": "Humanities"},
+        atomic=True,
+    )
+
+    assert response.status_code == 409
+    assert response.json()["detail"]["results"] == [
+        {"slug": "library", "status": "conflict", "current_version": 1}
+    ]
+    sci = client.get("/api/sci").json()
+    assert sci["description"] == ""
+    assert sci["version"] == 1
+
+
+def test_patch_without_changes_keeps_version(client, buildings):
+    before = feed.latest_id
+    response = _patch(client, {"slug": "library", "version": 1})
+
+    body = response.json()
+    assert body["updated"] == 0
+    assert body["unchanged"] == 1
+    assert body["results"][0]["building"]["version"] == 1
+    assert feed.latest_id == before
+
+    # A stale version still conflicts
+    assert _patch(client, {"slug": "library", "version": 0}).json()["conflicts"] == 1
+
+
+def test_patch_rename_moves_slug(client, buildings):
+    before = feed.latest_id
+    response = _patch(client, {"slug": "sci", "version": 1, "name": "Science Complex"})
+
+    building = response.json()["results"][0]["building"]
+    assert building["slug"] == "science-complex"
+    assert client.get("/api/science-complex").status_code == 200
+    assert client.get("/api/sci").status_code == 404
+
+    event = feed.since(before)[-1]
+    assert event[1] == "updated"
+    assert '"previous_slug":"sci"' in event[2]
+
+
+def test_patch_rename_onto_taken_slug(client, buildings):
+    response = _patch(client, {"slug": "sci", "version": 1, "name": "Library"})
+
+    assert response.json()["results"] == [{"slug": "sci", "status": "slug_taken", "new_slug": "library"}]
+    assert _patch(client, {"slug": "sci", "version": 1, "name": "Library"}, atomic=True).status_code == 409
+
+
+def test_patch_validation(client, buildings):
+    assert _patch(client).status_code == 422
+    assert _patch(client, {"slug": "sci", "version": 1, "name": None}).status_code == 422
+    duplicate = {"slug": "sci", "version": 1, "description": "x"}
+    assert _patch(client, duplicate, duplicate).status_code == 422
+
+
+def test_put_checks_version(client, buildings):
+    response = client.put("/api/sci", json={"description": "Labs", "version": 3})
+    assert response.status_code == 409
+
+    response = client.put("/api/sci", json={"description": "Labs", "version": 1})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    assert client.put("/api/sci", json={"description": "Labs", "version": "one"}).status_code == 400
+    assert client.put("/api/sci", json={"description": 5}).status_code == 400
+    assert client.put("/api/missing", json={"description": "Labs"}).status_code == 404
+
+
+def test_put_without_changes_keeps_version(client, buildings):
+    before = feed.latest_id
+    response = client.put("/api/sci", json={"version": 1})
+
+    assert response.status_code == 200
+    assert response.json()["version"] == 1
+    assert feed.latest_id == before
+    assert client.put("/api/sci", json={"version": 4}).status_code == 409
+    assert client.put("/api/missing", json={}).status_code == 404
@@ -0,0 +1,70 @@
+import os
+import pytest
+from backend.catalog_snapshot import CatalogSnapshot, publish_snapshot, snapshot
+
+FOOTPRINT = [[[3.37, 6.5], [3.371, 6.5], [3.371, 6.501], [3.37, 6.5]]]
+
+
+@pytest.fixture
+def published(tmp_path, monkeypatch):
+    """Enable the shared snapshot for one test, in a temp dir"""
+    monkeypatch.setattr(snapshot, "path", str(tmp_path / "catalog.snap"))
+    yield snapshot
+    snapshot.view = None
+    snapshot._inode = None
+
+
+@pytest.fixture
+def catalog(add_building):
+    add_building("library", image="library.jpg", image_data=b"jpeg", mime_type="image/jpeg", footprint=FOOTPRINT)
+    add_building("sci", facilities=["Labs"], coordinates=None)
+
+
+def test_snapshot_list_matches_database(client, catalog, published):
+    from_db = client.get("/api/buildings")
+    publish_snapshot()
+    assert published.view is not None
+    from_snapshot = client.get("/api/buildings")
+
+    assert from_snapshot.status_code == from_db.status_code == 200
+    assert from_snapshot.json() == from_db.json()
+    assert list(from_snapshot.json()[0]) == list(from_db.json()[0])
+
+
+@pytest.mark.parametrize("slug", ["library", "sci"])
+def test_snapshot_detail_matches_database(client, catalog, published, slug):
+    from_db = client.get(f"/api/{slug}")
+    publish_snapshot()
+    from_snapshot = client.get(f"/api/{slug}")
+
+    assert from_snapshot.status_code == from_db.status_code == 200
+    assert from_snapshot.json() == from_db.json()
+    assert list(from_snapshot.json()) == list(from_db.json())
+
+
+def test_other_worker_attaches_new_generation(catalog, published):
+    publish_snapshot()
+    first = published.view.generation
+
+    other = CatalogSnapshot(published.path)
+    assert other.refresh()
+    assert other.view.generation == first
+    assert not other.refresh()
+
+    publish_snapshot()
+    assert other.refresh()
+    assert other.view.generation == first + 1
+    # Only buildings with a location have coordinates
+    assert other.view.slugs == ["library"]
+
+
+def test_withdraw_falls_back_to_database(client, catalog, published):
+    publish_snapshot()
+    other = CatalogSnapshot(published.path)
+    other.refresh()
+
+    published.withdraw()
+    assert not os.path.exists(published.path)
+    assert other.refresh()
+    assert other.view is None
+    assert client.get("/api/library").json()["slug"] == "library"
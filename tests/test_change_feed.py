@@ -0,0 +1,156 @@
+import asyncio
+import json
+import threading
+import pytest
+from starlette.requests import Request
+from backend import change_feed
+from backend.change_feed import ChangeFeed
+from backend.routes import building as building_routes
+from backend.core.config import settings
+from backend.utils.catalog import CatalogChange
+
+
+def _changes(*slugs):
+    return [CatalogChange("updated", slug) for slug in slugs]
+
+
+def test_local_ids_are_unique_across_threads():
+    feed = ChangeFeed("")
+    threads = [threading.Thread(target=feed.publish, args=(_changes(f"b{i}"),)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    events = feed.since(0)
+    assert [event[0] for event in events] == list(range(1, 21))
+    assert feed.latest_id == 20
+    assert feed.since(20) == []
+    assert feed.since(21) is None
+
+
+def test_since_reports_gaps():
+    feed = ChangeFeed("", replay=3)
+    feed.publish(_changes("a", "b", "c", "d", "e"))
+
+    assert [event[0] for event in feed.since(2)] == [3, 4, 5]
+    assert feed.since(1) is None
+    assert feed.since(0) is None
+    event_id, name, data = feed.since(4)[0]
+    assert (event_id, name) == (5, "updated")
+    assert json.loads(data)["slug"] == "e"
+
+
+def test_workers_share_ids_through_the_log(tmp_path):
+    path = str(tmp_path / "changes.log")
+    writer, reader = ChangeFeed(path, poll_interval=0.01), ChangeFeed(path, poll_interval=0.01)
+
+    async def main():
+        reader.subscribe()
+        try:
+            writer.publish(_changes("a"))
+            reader.publish(_changes("b", "c"))
+            assert await reader.wait(1)
+            while reader.latest_id < 3:
+                await reader.wait(1)
+        finally:
+            reader.unsubscribe()
+
+    asyncio.run(main())
+    assert [(event[0], json.loads(event[2])["slug"]) for event in reader.since(0)] == [(1, "a"), (2, "b"), (3, "c")]
+
+
+def test_log_is_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(change_feed, "MAX_LOG_BYTES", 500)
+    path = str(tmp_path / "changes.log")
+    writer = ChangeFeed(path, replay=3)
+    for i in range(20):
+        writer.publish(_changes(f"b{i}"))
+
+    with open(path) as f:
+        ids = [json.loads(line)["id"] for line in f]
+    assert len(ids) <= 4
+    assert ids[-1] == 20
+
+    reader = ChangeFeed(path, replay=3)
+    reader._read_log()
+    assert reader.latest_id == 20
+    assert [event[0] for event in reader.since(17)] == [18, 19, 20]
+
+
+def _request(headers=None) -> Request:
+    return Request({
+        "type": "http", "method": "GET", "path": "/api/buildings/changes", "query_string": b"",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    feed = ChangeFeed("")
+    monkeypatch.setattr(building_routes, "feed", feed)
+    monkeypatch.setattr(settings, "CHANGE_FEED_KEEPALIVE", 0.05)
+    return feed
+
+
+def _stream(feed, headers=None, last_event_id=None, after=None):
+    """First chunks of the event stream; `after` runs once the stream is open"""
+    async def main():
+        response = await building_routes.stream_building_changes(_request(headers), last_event_id)
+        assert response.media_type == "text/event-stream"
+        body = response.body_iterator
+        try:
+            chunks = [await body.__anext__()]
+            if after:
+                after()
+            chunks.append(await asyncio.wait_for(body.__anext__(), 1))
+            return chunks
+        finally:
+            await body.aclose()
+            assert feed.listeners == 0
+
+    return asyncio.run(main())
+
+
+def test_stream_resumes_after_last_event_id(feed):
+    feed.publish(_changes("a", "b", "c"))
+
+    opening, events = _stream(feed, headers={"Last-Event-ID": "1"})
+    assert opening == "retry: 3000\nid: 1\n\n"
+    assert [line for line in events.splitlines() if line.startswith("id:")] == ["id: 2", "id: 3"]
+    assert '"slug":"c"' in events
+
+
+def test_stream_sends_new_events(feed):
+    feed.publish(_changes("a"))
+
+    opening, event = _stream(feed, after=lambda: feed.publish(_changes("b")))
+    assert opening == "retry: 3000\nid: 1\n\n"
+    assert event.startswith("id: 2\nevent: updated\ndata: ")
+
+
+def test_stream_resets_clients_that_fell_behind(feed):
+    feed.publish(_changes("a", "b"))
+
+    _, event = _stream(feed, last_event_id=7)
+    assert event == "id: 2\nevent: reset\ndata: {}\n\n"
+
+
+def test_idle_stream_keeps_alive(feed):
+    _, comment = _stream(feed)
+    assert comment == ": keepalive\n\n"
+
+
+def test_bad_last_event_id(client):
+    response = client.get("/api/buildings/changes", headers={"Last-Event-ID": "latest"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Last-Event-ID must be an integer"
+
+
+def test_mutations_are_published(client):
+    before = change_feed.feed.latest_id
+    client.post("/api/buildings/create", json={"name": "Great Hall", "department": "Arts"})
+
+    (event_id, name, data), = change_feed.feed.since(before)
+    assert (event_id, name) == (before + 1, "created")
+    assert json.loads(data)["slug"] == "great-hall"
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from backend.utils.geo_utils import WALKING_SPEED_MPS, haversine, haversine_matrix
+
+POINTS = [(6.5, 3.37), (6.501, 3.371), (51.5, -0.12)]
+
+
+def test_matrix_matches_scalar_haversine():
+    lat = np.radians([p[0] for p in POINTS])
+    lng = np.radians([p[1] for p in POINTS])
+    matrix = haversine_matrix(lat, lng, lat[:2], lng[:2])
+
+    assert matrix.shape == (3, 2)
+    for i, a in enumerate(POINTS):
+        for j, b in enumerate(POINTS[:2]):
+            assert matrix[i, j] == pytest.approx(haversine(*a, *b))
+    assert matrix[0, 0] == 0
+    # About 157 m across a 0.001 degree diagonal near the equator
+    assert 150 < matrix[0, 1] < 160
+
+
+@pytest.fixture
+def campus(add_building):
+    add_building("library", coordinates={"lat": 6.5, "lng": 3.37})
+    add_building("sci", coordinates={"lat": 6.501, "lng": 3.371})
+    add_building("nowhere", coordinates=None)
+
+
+def test_matrix_of_slugs_and_points(client, campus):
+    response = client.post("/api/navigation/distance-matrix", json={
+        "origins": ["library", {"lat": 6.501, "lng": 3.371}],
+        "destinations": ["sci"],
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["origins"] == ["library", {"lat": 6.501, "lng": 3.371}]
+    assert body["destinations"] == ["sci"]
+    expected = round(haversine(6.5, 3.37, 6.501, 3.371))
+    assert body["distances"] == [[expected], [0]]
+    assert body["durations"] == [[round(expected / WALKING_SPEED_MPS)], [0]]
+
+
+def test_destinations_default_to_origins(client, campus):
+    body = client.post("/api/navigation/distance-matrix", json={"origins": ["library", "sci"]}).json()
+    distances = body["distances"]
+    assert distances[0][0] == distances[1][1] == 0
+    assert distances[0][1] == distances[1][0]
+
+
+def test_unknown_buildings(client, campus):
+    response = client.post("/api/navigation/distance-matrix", json={"origins": ["library", "nowhere", "gone"]})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Buildings not found: nowhere, gone"
+
+
+def test_list_sizes(client, campus):
+    assert client.post("/api/navigation/distance-matrix", json={"origins": []}).status_code == 422
+    too_many = [{"lat": 0, "lng": 0}] * 1001
+    assert client.post("/api/navigation/distance-matrix", json={"origins": too_many}).status_code == 422
@@ -0,0 +1,78 @@
+import pytest
+from backend.utils.facility_index import FacilityIndex
+
+ROWS = [
+    ("library", "Library", ["Reading Rooms", "Computer Labs"]),
+    ("eng", "School of Engineering", ["Computer Labs", "Workshops"]),
+    ("sci", "School of Science", ["Laboratories"]),
+    ("hall", "School of Engineering", None),
+]
+
+
+def test_filter_all_or_any():
+    index = FacilityIndex(ROWS)
+
+    assert index.filter(["computer  LABS", "workshops"]) == {"eng"}
+    assert index.filter(["Workshops", "Laboratories"], match_all=False) == {"eng", "sci"}
+    assert index.filter(["Pool"]) == set()
+    assert index.filter() == {"library", "eng", "sci", "hall"}
+
+
+def test_filter_departments():
+    index = FacilityIndex(ROWS)
+
+    assert index.filter(departments=["school of engineering"]) == {"eng", "hall"}
+    assert index.filter(["Computer Labs"], ["Library", "School of Science"]) == {"library"}
+
+
+def test_facets_use_display_labels():
+    index = FacilityIndex(ROWS)
+
+    assert index.facets({"library", "eng"}) == {
+        "facility": {"Computer Labs": 2, "Reading Rooms": 1, "Workshops": 1},
+        "department": {"Library": 1, "School of Engineering": 1},
+    }
+
+
+@pytest.fixture
+def catalog(add_building):
+    for slug, department, facilities in ROWS:
+        add_building(slug, department=department, facilities=facilities,
+                     image=f"{slug}.jpg" if slug == "eng" else None,
+                     image_data=b"jpeg" if slug == "eng" else None)
+
+
+def test_list_filters_by_facility_and_department(client, catalog):
+    response = client.get("/api/buildings", params={"facility": "Computer Labs", "department": "School of Engineering"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1
+    assert [b["slug"] for b in body["buildings"]] == ["eng"]
+    assert body["buildings"][0]["image"] == "/api/buildings/image/eng.jpg"
+    # The filtered list never loads image blobs
+    assert body["buildings"][0]["image_data"] is None
+    assert body["facets"]["facility"] == {"Computer Labs": 1, "Workshops": 1}
+
+
+def test_list_match_any(client, catalog):
+    body = client.get("/api/buildings", params=[("facility", "Workshops"), ("facility", "Laboratories"), ("match", "any")]).json()
+    assert sorted(b["slug"] for b in body["buildings"]) == ["eng", "sci"]
+
+
+def test_list_facets_without_filtering(client, catalog):
+    body = client.get("/api/buildings", params={"facets": "true"}).json()
+    assert body["total"] == 4
+    assert body["facets"]["department"]["School of Engineering"] == 2
+
+
+def test_list_no_match(client, catalog):
+    body = client.get("/api/buildings", params={"facility": "Pool"}).json()
+    assert body == {"total": 0, "buildings": [], "facets": {"facility": {}, "department": {}}}
+    assert client.get("/api/buildings", params={"match": "some"}).status_code == 422
+
+
+def test_index_follows_catalog_changes(client, catalog):
+    assert client.get("/api/buildings", params={"facility": "Laboratories"}).json()["total"] == 1
+    client.patch("/api/buildings", json={"updates": [{"slug": "library", "version": 1, "facilities": ["Laboratories"]}]})
+    assert client.get("/api/buildings", params={"facility": "Laboratories"}).json()["total"] == 2
@@ -0,0 +1,117 @@
+import math
+import pytest
+from backend.routes import navigation
+from backend.utils.indoor_routing import STAIRS_M_PER_LEVEL, BuildingGraph
+from backend.utils.geo_utils import haversine
+
+# Entrance and hall on the ground floor, a room upstairs; stairs and a lift link the floors
+NODES = [
+    ("E", "Main entrance", "entrance", 0, 6.5000, 3.3700),
+    ("H", None, "corridor", 0, 6.5001, 3.3700),
+    ("ST1", "Landing", "stairs", 1, 6.5001, 3.3700),
+    ("R1", "Reading room", "room", 1, 6.5002, 3.3700),
+    ("X", "Store", "room", 0, 6.5003, 3.3700),
+]
+CONNECTORS = [
+    ("E", "H", "corridor", None),
+    ("H", "ST1", "lift", None),
+    ("H", "ST1", "stairs", None),
+    ("ST1", "R1", "door", 5.0),
+]
+
+
+def test_building_graph_paths():
+    graph = BuildingGraph("library", NODES, CONNECTORS)
+    e, h, st1, r1, x = (graph.positions[code] for code in ("E", "H", "ST1", "R1", "X"))
+
+    distance, path = graph.path(e, r1)
+    assert path == [e, h, st1, r1]
+    assert distance == pytest.approx(haversine(6.5, 3.37, 6.5001, 3.37) + STAIRS_M_PER_LEVEL + 5.0)
+    # Stairs are cheaper than waiting for the lift for one floor
+    assert graph.via[(h, st1)] == "stairs"
+    assert graph.entrance_distance[0, r1] == pytest.approx(distance)
+    assert graph.path_to_entrance(r1, 0) == [r1, st1, h, e]
+    assert graph.path(e, x) == (math.inf, [])
+
+
+def _plan(nodes=NODES, connectors=CONNECTORS):
+    floors = sorted({node[3] for node in nodes})
+    return {
+        "floors": [{"level": level, "name": f"Level {level}"} for level in floors],
+        "nodes": [dict(zip(("code", "name", "kind", "level", "lat", "lng"), node)) for node in nodes],
+        "connectors": [dict(zip(("from_code", "to_code", "kind", "length_m"), c)) for c in connectors],
+    }
+
+
+@pytest.fixture
+def campus(client, add_building, monkeypatch):
+    # Indoor graphs are cached by building id and version, which repeat between tests
+    monkeypatch.setattr(navigation, "_building_graphs", {})
+    add_building("library", coordinates={"lat": 6.5, "lng": 3.37})
+    add_building("sci", coordinates={"lat": 6.501, "lng": 3.371})
+    response = client.put("/api/buildings/library/indoor", json=_plan())
+    assert response.status_code == 200
+    assert response.json() == {"slug": "library", "floors": 2, "nodes": 5, "connectors": 4}
+
+
+def test_plan_round_trip(client, campus):
+    plan = client.get("/api/buildings/library/indoor").json()
+
+    assert plan["floors"] == [{"level": 0, "name": "Level 0"}, {"level": 1, "name": "Level 1"}]
+    assert [n["code"] for n in plan["nodes"]] == ["E", "H", "ST1", "R1", "X"]
+    assert plan["connectors"][3] == {"from_code": "ST1", "to_code": "R1", "kind": "door", "length_m": 5.0}
+    assert client.get("/api/buildings/gone/indoor").status_code == 404
+
+
+def test_invalid_plans_are_rejected(client, campus):
+    no_entrance = [n for n in NODES if n[2] != "entrance"]
+    assert client.put("/api/buildings/library/indoor", json=_plan(no_entrance, [])).status_code == 422
+    duplicated = _plan()
+    duplicated["nodes"].append(duplicated["nodes"][0])
+    assert client.put("/api/buildings/library/indoor", json=duplicated).status_code == 422
+    assert client.put("/api/buildings/gone/indoor", json=_plan()).status_code == 404
+
+
+def test_route_into_a_room(client, campus):
+    response = client.get("/api/navigation/route", params={"origin": "sci", "destination": "library", "room": "R1"})
+
+    assert response.status_code == 200
+    steps = response.json()["steps"]
+    assert [s["type"] for s in steps] == ["outdoor", "indoor", "indoor", "indoor", "indoor"]
+    assert steps[0]["slug"] == "sci"
+    assert [s["code"] for s in steps[1:]] == ["E", "H", "ST1", "R1"]
+    assert steps[1]["kind"] == "entrance"
+    assert steps[3]["via"] == "stairs"
+    assert steps[-1]["level"] == 1
+    assert steps[-1]["name"] == "Reading room"
+
+
+def test_route_between_rooms_stays_indoors(client, campus):
+    response = client.get("/api/navigation/route", params={
+        "origin": "library", "origin_room": "R1", "destination": "library", "room": "E"
+    })
+
+    body = response.json()
+    assert [s["code"] for s in body["steps"]] == ["ST1", "H", "E"]
+    assert body["remaining_m"] == round(haversine(6.5, 3.37, 6.5001, 3.37) + STAIRS_M_PER_LEVEL + 5.0)
+
+
+def test_route_errors(client, campus):
+    def status(**params):
+        return client.get("/api/navigation/route", params=params).status_code
+
+    assert status(destination="library", room="R1", origin_room="E", lat=6.5, lng=3.37) == 400
+    assert status(destination="library", room="R9", origin="sci") == 404
+    assert status(destination="sci", room="R1", origin="library") == 404
+    assert status(destination="gone", origin="library") == 404
+    # The store is not connected to anything
+    assert status(destination="library", room="X", origin="sci") == 404
+
+
+def test_replaced_plan_is_routed(client, campus):
+    nodes = [n for n in NODES if n[0] != "R1"]
+    client.put("/api/buildings/library/indoor", json=_plan(nodes, CONNECTORS[:3]))
+
+    response = client.get("/api/navigation/route", params={"origin": "sci", "destination": "library", "room": "R1"})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Room R1 not found in library"
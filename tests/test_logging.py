@@ -0,0 +1,94 @@
+import json
+import logging
+import queue
+import sys
+import pytest
+from pydantic import ValidationError
+from backend.core.config import Settings
+from backend.core.logging_config import (
+    ACCESS_LOGGER, AccessSamplingFilter, DroppingQueueHandler, JsonFormatter, RequestIdFilter, request_id_var
+)
+
+
+def _record(name="navigation", msg="hello %s", args=("world",), exc_info=None, **extra):
+    record = logging.LogRecord(name, logging.INFO, __file__, 1, msg, args, exc_info)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def _failure():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        return sys.exc_info()
+
+
+def test_json_records_carry_extras():
+    entry = json.loads(JsonFormatter().format(_record(status=200, path="/api/buildings", client=None)))
+
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["status"] == 200
+    assert entry["path"] == "/api/buildings"
+    assert "client" not in entry
+    assert entry["time"].endswith("Z")
+
+
+def test_queued_records_keep_their_traceback():
+    handler = DroppingQueueHandler(queue.Queue())
+    prepared = handler.prepare(_record(exc_info=_failure()))
+
+    assert prepared.args is None
+    assert prepared.exc_info is None
+    entry = json.loads(JsonFormatter().format(prepared))
+    assert entry["message"] == "hello world"
+    assert "ValueError: boom" in entry["exc_info"]
+
+
+def test_full_queue_drops_records():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    before = DroppingQueueHandler.dropped
+    handler.emit(_record())
+    handler.emit(_record())
+
+    assert handler.queue.qsize() == 1
+    assert DroppingQueueHandler.dropped == before + 1
+
+
+def test_access_sampling():
+    drop_routine = AccessSamplingFilter(sample_rate=0, slow_ms=1000)
+
+    assert not drop_routine.filter(_record(ACCESS_LOGGER, status=200, duration_ms=5))
+    assert drop_routine.filter(_record(ACCESS_LOGGER, status=503, duration_ms=5))
+    assert drop_routine.filter(_record(ACCESS_LOGGER, status=200, duration_ms=1500))
+    assert drop_routine.filter(_record("navigation", status=200, duration_ms=5))
+    assert AccessSamplingFilter(sample_rate=1, slow_ms=1000).filter(_record(ACCESS_LOGGER, status=200))
+
+
+def test_request_id_is_attached():
+    token = request_id_var.set("abc123")
+    try:
+        record = _record()
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+    assert record.request_id == "abc123"
+
+
+def test_requests_are_logged_with_their_id(client, caplog):
+    with caplog.at_level(logging.INFO, logger=ACCESS_LOGGER):
+        response = client.get("/api/buildings", headers={"X-Request-ID": "abc123"})
+
+    assert response.headers["x-request-id"] == "abc123"
+    record, = [r for r in caplog.records if r.name == ACCESS_LOGGER]
+    assert record.getMessage() == "GET /api/buildings 200"
+    assert record.status == 200
+    assert record.path == "/api/buildings"
+    assert client.get("/api/buildings").headers["x-request-id"]
+
+
+def test_log_level_is_validated():
+    assert Settings(LOG_LEVEL="warning").LOG_LEVEL == "WARNING"
+    with pytest.raises(ValidationError):
+        Settings(LOG_LEVEL="loud")
@@ -0,0 +1,68 @@
+import pytest
+from backend.utils.catalog import bump_catalog_version
+from backend.utils.geo_utils import ClusterGrid
+
+
+def test_cluster_grid_merges_nearby_points():
+    points = [(6.5, 3.37), (6.5001, 3.3701), (6.6, 3.5)]
+    grid = ClusterGrid(points)
+
+    assert sorted(count for _, count, *_ in grid.clusters(20)) == [1, 1, 1]
+    assert sorted(count for _, count, *_ in grid.clusters(12)) == [1, 2]
+    (cluster_id, count, lat, lng, first), = grid.clusters(0)
+    # Zoom 0 is cut into 4x4 cells; the campus is east of Greenwich, north of the equator
+    assert cluster_id == "0/2/1"
+    assert count == 3
+    assert lat == pytest.approx(sum(p[0] for p in points) / 3)
+    assert first == 0
+
+
+@pytest.fixture
+def campus(add_building):
+    add_building("library", coordinates={"lat": 6.5, "lng": 3.37})
+    add_building("sci", coordinates={"lat": 6.5001, "lng": 3.3701})
+    add_building("farm", coordinates={"lat": 6.6, "lng": 3.5})
+    add_building("nowhere", coordinates=None)
+
+
+def test_layer_lists_buildings_with_a_location(client, campus):
+    response = client.get("/api/map/buildings")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/geo+json"
+    features = response.json()["features"]
+    assert [f["properties"]["slug"] for f in features] == ["farm", "library", "sci"]
+    assert features[1]["geometry"] == {"type": "Point", "coordinates": [3.37, 6.5]}
+    assert set(features[1]["properties"]) == {"slug", "name", "department"}
+
+
+def test_layer_clusters_by_zoom(client, campus):
+    features = client.get("/api/map/buildings", params={"zoom": 12}).json()["features"]
+    clusters = [f["properties"] for f in features if f["properties"].get("cluster")]
+    assert [c["point_count"] for c in clusters] == [2]
+    assert client.get("/api/map/buildings", params={"zoom": 21}).status_code == 422
+
+
+def test_layer_etag_revalidates(client, campus):
+    response = client.get("/api/map/buildings", params={"zoom": 12})
+    etag = response.headers["etag"]
+
+    cached = client.get("/api/map/buildings", params={"zoom": 12}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    other_zoom = client.get("/api/map/buildings", params={"zoom": 20}, headers={"If-None-Match": etag})
+    assert other_zoom.status_code == 200
+
+
+def test_layer_etag_follows_content(client, campus, add_building):
+    etag = client.get("/api/map/buildings").headers["etag"]
+    # Rebuilding an unchanged layer, e.g. in another worker, gives the same tag
+    bump_catalog_version(notify=False)
+    assert client.get("/api/map/buildings").headers["etag"] == etag
+
+    add_building("hall", coordinates={"lat": 6.51, "lng": 3.38})
+    response = client.get("/api/map/buildings", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,131 @@
+import os
+import random
+import msgpack
+import pytest
+from pydantic import SecretStr
+from backend.core.config import settings
+from backend.offline_bundle import BundleStore, store
+from backend.utils.binary_delta import DeltaError, apply_delta, make_delta
+
+
+def _random_bytes(rng: random.Random, size: int) -> bytes:
+    return bytes(rng.getrandbits(8) for _ in range(size))
+
+
+@pytest.mark.parametrize("edit", ["insert", "delete", "replace", "move", "append"])
+def test_delta_round_trip(edit):
+    rng = random.Random(edit)
+    source = _random_bytes(rng, 20000)
+    if edit == "insert":
+        target = source[:5000] + b"new building" + source[5000:]
+    elif edit == "delete":
+        target = source[:5000] + source[7000:]
+    elif edit == "replace":
+        target = source[:5000] + _random_bytes(rng, 300) + source[5300:]
+    elif edit == "move":
+        target = source[10000:] + source[:10000]
+    else:
+        target = source + _random_bytes(rng, 100)
+
+    delta = make_delta(source, target)
+    assert apply_delta(source, delta) == target
+    # Mostly copies, so far smaller than the target
+    assert len(delta) < len(target) // 10
+
+
+@pytest.mark.parametrize("source, target", [
+    (b"", b""),
+    (b"", b"only inserts"),
+    (b"short source", b""),
+    (b"short", b"shorter than a block"),
+])
+def test_delta_edge_cases(source, target):
+    assert apply_delta(source, make_delta(source, target)) == target
+
+
+def test_delta_rejects_wrong_input():
+    source = b"a" * 100 + b"b" * 100
+    delta = make_delta(source, source + b"c")
+
+    with pytest.raises(DeltaError):
+        apply_delta(b"other source", delta)
+    with pytest.raises(DeltaError):
+        apply_delta(source, b"not a delta")
+    with pytest.raises(DeltaError):
+        apply_delta(source, delta[:-1])
+
+
+def _bundle(n: int) -> bytes:
+    return msgpack.packb({"buildings": [f"building {i}" for i in range(n)]})
+
+
+def test_store_chains_versions(tmp_path):
+    bundles = BundleStore(str(tmp_path), keep=10)
+    first = bundles.publish(_bundle(1))
+    assert bundles.publish(_bundle(1)) == first
+    second = bundles.publish(_bundle(2))
+    third = bundles.publish(_bundle(3))
+
+    assert [v["version"] for v in bundles.versions()] == [1, 2, 3]
+    chain = bundles.patch_chain(first["hash"])
+    assert [(p["from"], p["to"]) for p in chain] == [(first["hash"], second["hash"]), (second["hash"], third["hash"])]
+    assert bundles.patch_chain(third["hash"]) == []
+    assert bundles.patch_chain("unknown") is None
+
+
+def test_store_prunes_only_unused_files(tmp_path):
+    bundles = BundleStore(str(tmp_path), keep=2)
+    a = bundles.publish(_bundle(1))
+    b = bundles.publish(_bundle(2))
+    # Content returns to an earlier state, so the dropped version's bundle is still in use
+    bundles.publish(_bundle(1))
+    c = bundles.publish(_bundle(3))
+
+    versions = bundles.versions()
+    assert [v["hash"] for v in versions] == [a["hash"], c["hash"]]
+    assert versions[0]["delta_size"] is None
+    assert os.path.exists(bundles.bundle_path(a["hash"]))
+    assert os.path.exists(bundles.delta_path(a["hash"], c["hash"]))
+    assert not os.path.exists(bundles.bundle_path(b["hash"]))
+    assert not os.path.exists(bundles.delta_path(a["hash"], b["hash"]))
+    assert bundles.patch_chain(b["hash"]) is None
+
+
+@pytest.fixture
+def admin(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "directory", str(tmp_path))
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", SecretStr("secret"))
+    return {"X-Admin-Token": "secret"}
+
+
+def test_build_needs_admin(client, admin):
+    assert client.post("/api/offline/build").status_code == 403
+    assert client.post("/api/offline/build", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_bundle_download_and_patches(client, admin, add_building):
+    assert client.get("/api/offline/manifest").status_code == 404
+    add_building("library")
+    first = client.post("/api/offline/build", headers=admin).json()
+
+    manifest = client.get("/api/offline/manifest").json()
+    assert manifest["hash"] == first["hash"]
+    response = client.get("/api/offline/bundle")
+    old_bundle = response.content
+    etag = response.headers["etag"]
+    assert msgpack.unpackb(old_bundle)["buildings"][0]["slug"] == "library"
+    assert client.get("/api/offline/bundle", headers={"If-None-Match": etag}).status_code == 304
+
+    add_building("sci")
+    latest = client.post("/api/offline/build", headers=admin).json()
+    assert latest["version"] == 2
+
+    patches = client.get("/api/offline/patches", params={"from": first["hash"]}).json()
+    assert patches["hash"] == latest["hash"]
+    bundle = old_bundle
+    for patch in patches["patches"]:
+        bundle = apply_delta(bundle, client.get(patch["url"]).content)
+    assert bundle == client.get("/api/offline/bundle").content
+
+    assert client.get("/api/offline/patches", params={"from": "unknown"}).status_code == 410
+    assert client.get(f"/api/offline/deltas/{latest['hash']}/{first['hash']}").status_code == 404
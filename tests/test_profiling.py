@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+import pytest
+from pydantic import SecretStr
+from backend.core.config import settings
+from backend.routes import admin as admin_routes
+from backend.utils.profiling import SamplingProfiler
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture
+def profiled(make_client, tmp_path):
+    return make_client(ADMIN_TOKEN=SecretStr("secret"), PROFILE_DIR=str(tmp_path))
+
+
+def test_profiles_marked_requests(profiled, add_building):
+    add_building("sci")
+    response = profiled.get("/api/sci", headers={**ADMIN, "X-Profile": "1"})
+
+    assert response.status_code == 200
+    name = response.headers["X-Profile-File"]
+    assert name.endswith(".pstats")
+    assert os.path.isfile(os.path.join(settings.PROFILE_DIR, name))
+
+
+def test_needs_admin_token(profiled, add_building):
+    add_building("sci")
+    response = profiled.get("/api/sci", headers={"X-Admin-Token": "wrong", "X-Profile": "1"})
+    assert "X-Profile-File" not in response.headers
+    assert profiled.get("/api/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_rate_limited_requests_are_not_profiled(make_client, add_building, tmp_path):
+    client = make_client(
+        ADMIN_TOKEN=SecretStr("secret"), PROFILE_DIR=str(tmp_path),
+        RATE_LIMIT_ENABLED=True, RATE_LIMIT_CAPACITY=1, RATE_LIMIT_REFILL_RATE=0.001
+    )
+    add_building("sci")
+    headers = {**ADMIN, "X-Profile": "1"}
+    assert client.get("/api/sci", headers=headers).status_code == 200
+
+    rejected = client.get("/api/sci", headers=headers)
+    assert rejected.status_code == 429
+    assert "X-Profile-File" not in rejected.headers
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_records_running_threads(tmp_path):
+    sampler = SamplingProfiler(str(tmp_path))
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy worker")
+    worker.start()
+    try:
+        name = sampler.start(5, interval=0.001)
+        with pytest.raises(RuntimeError):
+            sampler.start(5)
+        time.sleep(0.1)
+        sampler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert not sampler.running
+    assert sampler.current["samples"] > 0
+    lines = (tmp_path / name).read_text().splitlines()
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    assert any(line.startswith("busy_worker;") and "test_profiling:_busy_loop" in line for line in lines)
+
+
+@pytest.fixture
+def sampler(monkeypatch, tmp_path):
+    monkeypatch.setattr(admin_routes, "sampler", SamplingProfiler(str(tmp_path)))
+
+
+def test_sampling_run_through_the_api(profiled, sampler):
+    started = profiled.post("/api/admin/profiler/start", params={"seconds": 5, "interval_ms": 1}, headers=ADMIN)
+    assert started.status_code == 200
+    name = started.json()["file"]
+    assert profiled.post("/api/admin/profiler/start", headers=ADMIN).status_code == 409
+    assert profiled.get("/api/admin/profiles", headers=ADMIN).json()["sampling"]["running"]
+
+    stopped = profiled.post("/api/admin/profiler/stop", headers=ADMIN).json()
+    assert stopped["file"] == name
+    assert profiled.post("/api/admin/profiler/stop", headers=ADMIN).status_code == 409
+
+    listed = profiled.get("/api/admin/profiles", headers=ADMIN).json()
+    assert [p["file"] for p in listed["profiles"]] == [name]
+    download = profiled.get(f"/api/admin/profiles/{name}", headers=ADMIN)
+    assert download.status_code == 200
+    assert download.content == open(os.path.join(settings.PROFILE_DIR, name), "rb").read()
+
+
+def test_only_profiles_can_be_downloaded(profiled, tmp_path):
+    (tmp_path / "notes.txt").write_text("secret")
+    assert profiled.get("/api/admin/profiles/notes.txt", headers=ADMIN).status_code == 404
+    assert profiled.get("/api/admin/profiles/missing.pstats", headers=ADMIN).status_code == 404
+    assert profiled.get("/api/admin/profiles/..%2F..%2Fetc.pstats", headers=ADMIN).status_code == 404
+    assert profiled.post("/api/admin/profiler/start", params={"seconds": 0}, headers=ADMIN).status_code == 422
+
+
+def test_admin_routes_hidden_without_token(client):
+    assert client.get("/api/admin/profiles").status_code == 404
+    assert client.post("/api/admin/profiler/start", headers=ADMIN).status_code == 404
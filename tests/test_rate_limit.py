@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from backend.utils.rate_limit import LocalRateLimitBackend, client_address, route_cost
+
+
+def test_route_costs():
+    assert route_cost("GET", "/api/buildings") == 1.0
+    assert route_cost("GET", "/api/buildings/image/library.png") == 5.0
+    assert route_cost("POST", "/api/buildings/create") == 25.0
+    assert route_cost("POST", "/api/offline/build") == 50.0
+    assert route_cost("PATCH", "/api/buildings") == 25.0
+
+
+def test_client_address_trusts_only_proxy_entries():
+    assert client_address("10.0.0.1", None, 1) == "10.0.0.1"
+    assert client_address("10.0.0.1", "203.0.113.5", 1) == "203.0.113.5"
+    # The client can prepend anything; only the entry the proxy appended counts
+    assert client_address("10.0.0.1", "1.2.3.4, 203.0.113.5", 1) == "203.0.113.5"
+    assert client_address("10.0.0.1", "1.2.3.4, 203.0.113.5, 10.0.0.2", 2) == "203.0.113.5"
+    assert client_address("10.0.0.1", "203.0.113.5", 2) == "10.0.0.1"
+    assert client_address("10.0.0.1", "203.0.113.5", 0) == "10.0.0.1"
+    assert client_address(None, None, 1) == "unknown"
+
+
+def test_local_backend_refuses_when_empty():
+    backend = LocalRateLimitBackend()
+
+    async def main():
+        first = await backend.consume("a", 2, capacity=3, refill_rate=1)
+        second = await backend.consume("a", 2, capacity=3, refill_rate=1)
+        other = await backend.consume("b", 2, capacity=3, refill_rate=1)
+        return first, second, other
+
+    first, second, other = asyncio.run(main())
+    assert first.allowed and other.allowed
+    assert not second.allowed
+    assert second.retry_after == pytest.approx(1, abs=0.01)
+
+
+def test_local_backend_bounds_its_keys():
+    backend = LocalRateLimitBackend(max_keys=3)
+
+    async def main():
+        for key in "abcde":
+            await backend.consume(key, 1, capacity=3, refill_rate=0.001)
+
+    asyncio.run(main())
+    assert len(backend._buckets) <= 3
+
+
+@pytest.fixture
+def limited(make_client):
+    return make_client(RATE_LIMIT_ENABLED=True, RATE_LIMIT_CAPACITY=3, RATE_LIMIT_REFILL_RATE=0.5)
+
+
+def test_limit_returns_429_with_retry_after(limited):
+    for remaining in (2, 1, 0):
+        response = limited.get("/api/buildings")
+        assert response.status_code == 200
+        assert response.headers["ratelimit-limit"] == "3"
+        assert response.headers["ratelimit-remaining"] == str(remaining)
+
+    response = limited.get("/api/buildings")
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Too many requests"}
+    assert response.headers["retry-after"] == "2"
+    assert response.headers["ratelimit-remaining"] == "0"
+
+
+def test_429_carries_cors_headers(limited):
+    origin = {"Origin": "https://map.example.edu"}
+    for _ in range(3):
+        limited.get("/api/buildings", headers=origin)
+
+    response = limited.get("/api/buildings", headers=origin)
+    assert response.status_code == 429
+    assert response.headers["access-control-allow-origin"] == "https://map.example.edu"
+    assert "Retry-After" in response.headers["access-control-expose-headers"]
+
+
+def test_preflights_are_free(limited):
+    preflight = {"Origin": "https://map.example.edu", "Access-Control-Request-Method": "GET"}
+    for _ in range(5):
+        assert limited.options("/api/buildings", headers=preflight).status_code == 200
+    assert limited.get("/api/buildings").status_code == 200
+
+
+def test_expensive_routes_cost_more(make_client):
+    client = make_client(RATE_LIMIT_ENABLED=True, RATE_LIMIT_CAPACITY=6, RATE_LIMIT_REFILL_RATE=0.5)
+    assert client.get("/api/buildings/image/missing.png").status_code == 404
+    response = client.get("/api/buildings/image/missing.png")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "8"
+
+
+def test_forwarded_clients_get_their_own_bucket(make_client):
+    client = make_client(RATE_LIMIT_ENABLED=True, RATE_LIMIT_CAPACITY=1, RATE_LIMIT_REFILL_RATE=0.5,
+                         RATE_LIMIT_TRUST_FORWARDED=True, RATE_LIMIT_PROXY_HOPS=1)
+    assert client.get("/api/buildings", headers={"X-Forwarded-For": "203.0.113.5"}).status_code == 200
+    assert client.get("/api/buildings", headers={"X-Forwarded-For": "203.0.113.6"}).status_code == 200
+    # A spoofed leftmost entry does not buy a fresh bucket
+    spoofed = client.get("/api/buildings", headers={"X-Forwarded-For": "1.2.3.4, 203.0.113.5"})
+    assert spoofed.status_code == 429
+
+
+def test_broken_backend_fails_open(make_client, monkeypatch):
+    async def broken(self, *args):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(LocalRateLimitBackend, "consume", broken)
+    client = make_client(RATE_LIMIT_ENABLED=True, RATE_LIMIT_CAPACITY=1, RATE_LIMIT_REFILL_RATE=0.5)
+    for _ in range(3):
+        response = client.get("/api/buildings")
+        assert response.status_code == 200
+        assert "ratelimit-limit" not in response.headers
@@ -0,0 +1,100 @@
+import io
+import json
+import pytest
+from PIL import Image
+from backend import reencode_images
+from backend.database.models.building import Building
+from backend.utils import catalog
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(output, format="JPEG", quality=100)
+    return output.getvalue()
+
+
+@pytest.fixture
+def photos(add_building):
+    for slug in ("library", "sci"):
+        add_building(slug, image=f"{slug}.jpg", image_data=_jpeg(400, 300), mime_type="image/jpeg")
+
+
+def _run(tmp_path, **options):
+    return reencode_images.run(
+        chunk_size=1, workers=1, max_size=100, quality=80, pause=0,
+        checkpoint_path=str(tmp_path / "checkpoint.json"), **options
+    )
+
+
+def test_reencodes_and_checkpoints(tmp_path, db, photos):
+    state = _run(tmp_path)
+
+    assert state["processed"] == state["updated"] == 2
+    assert state["saved_bytes"] > 0
+    for building in db.query(Building):
+        assert building.version == 2
+        assert Image.open(io.BytesIO(building.image_data)).size == (100, 75)
+    with open(tmp_path / "checkpoint.json") as f:
+        assert json.load(f)["last_id"] == "sci"
+
+    # Resumes after the checkpoint, so nothing is left to do
+    assert _run(tmp_path)["processed"] == 2
+
+
+def test_dry_run_writes_nothing(tmp_path, db, photos):
+    state = _run(tmp_path, dry_run=True)
+
+    assert state["updated"] == 2
+    assert all(building.version == 1 for building in db.query(Building))
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+def test_skips_rows_changed_after_reading(tmp_path, db, photos, monkeypatch):
+    encode = reencode_images._reencode_row
+
+    def upload_while_encoding(row, max_size, quality):
+        # Stands in for an upload landing between the read and the write
+        if row[0] == "sci":
+            db.query(Building).filter(Building.id == "sci").update({"version": Building.version + 1})
+            db.commit()
+        return encode(row, max_size, quality)
+
+    monkeypatch.setattr(reencode_images, "_reencode_row", upload_while_encoding)
+    monkeypatch.setattr(reencode_images, "ProcessPoolExecutor", _InlinePool)
+    state = _run(tmp_path)
+
+    assert state["updated"] == 1
+    assert state["skipped"] == 1
+    sci = db.query(Building).filter(Building.id == "sci").one()
+    db.refresh(sci)
+    assert Image.open(io.BytesIO(sci.image_data)).size == (400, 300)
+
+
+def test_other_workers_refresh_thumbnails(tmp_path, client, photos, monkeypatch):
+    before = client.get("/api/buildings/sprite", params={"slugs": "library"}).json()
+    assert before["tiles"]["library"]["w"] == 128
+
+    # Another worker only sees the catalog change, never the job's listener calls
+    monkeypatch.setattr(catalog, "_listeners", [])
+    _run(tmp_path)
+    catalog.bump_catalog_version(notify=False)
+
+    after = client.get("/api/buildings/sprite", params={"slugs": "library"}).json()
+    assert after["id"] != before["id"]
+    assert after["tiles"]["library"]["w"] == 100
+
+
+class _InlinePool:
+    """Runs the encoder in this process so a test can patch it"""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
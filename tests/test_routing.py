@@ -0,0 +1,113 @@
+import pytest
+from backend.utils.geo_utils import CoordinateTable
+from backend.utils.routing import NavigationSession, WalkGraph
+
+# a -> b runs east, b -> c north; d is off the route, north of c
+POINTS = {
+    "a": (6.500, 3.370),
+    "b": (6.500, 3.371),
+    "c": (6.501, 3.371),
+    "d": (6.503, 3.370),
+}
+
+
+@pytest.fixture
+def graph():
+    table = CoordinateTable((slug, {"lat": lat, "lng": lng}) for slug, (lat, lng) in POINTS.items())
+    # One neighbour each keeps the graph a chain, so routes pass through every node
+    return WalkGraph(table, {slug: slug.upper() for slug in POINTS}, neighbours=1)
+
+
+def test_start_on_entry_node_departs(graph):
+    session = NavigationSession(graph, "c")
+    message = session.start(*POINTS["a"])
+
+    assert message["type"] == "instruction"
+    assert [step["slug"] for step in message["steps"]] == ["b", "c"]
+    assert [step["turn"] for step in message["steps"]] == ["depart", "left"]
+
+
+def test_turns_come_from_walked_segments(graph):
+    session = NavigationSession(graph, "c")
+    # West of a, so a is the first waypoint
+    message = session.start(6.500, 3.3697)
+    assert message["steps"][0]["slug"] == "a"
+    assert message["steps"][0]["turn"] == "depart"
+
+    message, rerouted = session.update(*POINTS["a"])
+    assert not rerouted
+    # The start fix is not a route node, so there is no heading yet
+    assert message["steps"][0]["slug"] == "b"
+    assert message["steps"][0]["turn"] == "depart"
+
+    message, _ = session.update(*POINTS["b"])
+    # Walked a -> b eastwards, so heading north to c is a left turn
+    assert message["steps"][0]["slug"] == "c"
+    assert message["steps"][0]["turn"] == "left"
+
+
+def test_reroute_departs_again(graph):
+    session = NavigationSession(graph, "c")
+    session.start(*POINTS["a"])
+
+    message, rerouted = session.update(*POINTS["d"])
+    assert rerouted
+    assert message["steps"][0]["slug"] == "c"
+    assert message["steps"][0]["turn"] == "depart"
+
+
+def test_arrives_at_destination(graph):
+    session = NavigationSession(graph, "c")
+    session.start(*POINTS["b"])
+    message, _ = session.update(*POINTS["c"])
+    assert message == {"type": "arrived", "destination": "c"}
+    assert session.arrived
+
+
+@pytest.fixture
+def campus(add_building):
+    add_building("gate", coordinates={"lat": 6.5, "lng": 3.37})
+    add_building("hall", coordinates={"lat": 6.501, "lng": 3.37})
+    add_building("sci", coordinates={"lat": 6.501, "lng": 3.371})
+
+
+def test_route_from_entry_node_departs(client, campus):
+    response = client.get("/api/navigation/route", params={"destination": "sci", "lat": 6.5, "lng": 3.37})
+    assert response.status_code == 200
+    steps = response.json()["steps"]
+    assert steps[0]["turn"] == "depart"
+    assert steps[-1]["slug"] == "sci"
+
+
+def test_route_unknown_destination(client, campus):
+    response = client.get("/api/navigation/route", params={"destination": "nope", "lat": 6.5, "lng": 3.37})
+    assert response.status_code == 404
+
+
+def test_session_first_instruction_departs(client, campus):
+    with client.websocket_connect("/api/navigation/sessions?destination=sci") as websocket:
+        websocket.send_json({"lat": 6.5, "lng": 3.37})
+        message = websocket.receive_json()
+        assert message["type"] == "instruction"
+        assert message["steps"][0]["turn"] == "depart"
+
+        websocket.send_json({"lat": 6.501, "lng": 3.371})
+        assert websocket.receive_json() == {"type": "arrived", "destination": "sci"}
+
+
+def test_session_survives_malformed_frames(client, campus):
+    with client.websocket_connect("/api/navigation/sessions?destination=sci") as websocket:
+        websocket.send_text("not json")
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_bytes(b"\xff")
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_json({"lat": "north"})
+        assert websocket.receive_json()["type"] == "error"
+
+        websocket.send_json({"lat": 6.5, "lng": 3.37})
+        assert websocket.receive_json()["type"] == "instruction"
+
+
+def test_session_unknown_destination(client, campus):
+    with client.websocket_connect("/api/navigation/sessions?destination=nope") as websocket:
+        assert websocket.receive_json() == {"type": "error", "detail": "Building not found"}
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+import pytest
+from backend.routes import building as building_routes
+from backend.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"slug": "library"}
+
+    async def main():
+        waiters = [asyncio.create_task(flight.do("library", fetch)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        assert flight.in_flight() == 1
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        raise ValueError("database down")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        # The failed call is forgotten, so the next caller tries again
+        with pytest.raises(ValueError):
+            await flight.do("key", fetch)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_timeout_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        return "done"
+
+    async def main():
+        patient = asyncio.create_task(flight.do("key", fetch))
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.do("key", fetch, timeout=0.05)
+        release.set()
+        return await patient
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_reads_go_through_single_flight(client, add_building):
+    add_building("library", image="library.png", image_data=b"png", mime_type="image/png")
+
+    body = client.get("/api/library").json()
+    assert body["slug"] == "library"
+    assert body["image"] == "api/buildings/image/library.png"
+    response = client.get("/api/buildings/image/library.png")
+    assert response.content == b"png"
+    assert response.headers["content-type"] == "image/png"
+    assert client.get("/api/gone").status_code == 404
+    assert client.get("/api/buildings/image/gone.png").status_code == 404
+
+
+def test_slow_reads_time_out(client, monkeypatch):
+    def slow_fetch(filename):
+        time.sleep(0.3)
+
+    monkeypatch.setattr(building_routes, "_fetch_image", slow_fetch)
+    monkeypatch.setattr(building_routes, "READ_TIMEOUT", 0.05)
+    response = client.get("/api/buildings/image/slow.png")
+    assert response.status_code == 504
+    assert response.json()["detail"] == "Timed out loading image"
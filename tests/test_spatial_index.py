@@ -0,0 +1,74 @@
+import random
+import pytest
+from backend.utils.spatial_index import STRTree, point_in_polygon, ring_bbox
+
+SQUARE = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+HOLE = [[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]]
+
+
+def test_point_in_polygon_with_hole():
+    assert point_in_polygon(1, 1, [SQUARE])
+    assert not point_in_polygon(11, 1, [SQUARE])
+    assert point_in_polygon(5, 5, [SQUARE])
+    assert not point_in_polygon(5, 5, [SQUARE, HOLE])
+    assert point_in_polygon(3, 5, [SQUARE, HOLE])
+    assert not point_in_polygon(1, 1, [])
+
+
+def test_tree_matches_brute_force():
+    rng = random.Random(7)
+    items = []
+    for i in range(500):
+        x, y = rng.uniform(0, 100), rng.uniform(0, 100)
+        items.append(((x, y, x + rng.uniform(0, 5), y + rng.uniform(0, 5)), i))
+    tree = STRTree(items, node_capacity=8)
+
+    for _ in range(200):
+        x, y = rng.uniform(0, 105), rng.uniform(0, 105)
+        expected = {i for (x0, y0, x1, y1), i in items if x0 <= x <= x1 and y0 <= y <= y1}
+        assert set(tree.query_point(x, y)) == expected
+
+
+def test_empty_tree():
+    assert STRTree([]).query_point(0, 0) == []
+    assert ring_bbox(SQUARE) == (0, 0, 10, 10)
+
+
+# [lng, lat] rings around two neighbouring buildings
+LIBRARY = [[[3.370, 6.500], [3.371, 6.500], [3.371, 6.501], [3.370, 6.501], [3.370, 6.500]]]
+ANNEX = [[[3.3705, 6.5005], [3.372, 6.5005], [3.372, 6.502], [3.3705, 6.502], [3.3705, 6.5005]]]
+
+
+@pytest.fixture
+def campus(add_building):
+    add_building("library", footprint=LIBRARY)
+    add_building("annex", footprint=ANNEX)
+    add_building("sci", footprint=None)
+
+
+def test_locate_returns_containing_footprints(client, campus):
+    def located(lat, lng):
+        response = client.get("/api/navigation/locate", params={"lat": lat, "lng": lng})
+        assert response.status_code == 200
+        return sorted(b["slug"] for b in response.json()["buildings"])
+
+    assert located(6.5002, 3.3702) == ["library"]
+    assert located(6.5008, 3.3708) == ["annex", "library"]
+    assert located(6.5015, 3.3715) == ["annex"]
+    assert located(6.6, 3.5) == []
+
+
+def test_locate_validates_coordinates(client, campus):
+    assert client.get("/api/navigation/locate", params={"lat": 91, "lng": 0}).status_code == 422
+
+
+def test_footprints_are_validated(client):
+    response = client.post("/api/buildings/create", json={
+        "name": "Hall", "department": "Arts", "footprint": [[[3.37, 6.5], [3.371, 6.5]]]
+    })
+    assert response.status_code == 422
+
+    response = client.post("/api/buildings/create", json={"name": "Hall", "department": "Arts", "footprint": LIBRARY})
+    assert response.status_code == 200
+    located = client.get("/api/navigation/locate", params={"lat": 6.5002, "lng": 3.3702}).json()
+    assert [b["slug"] for b in located["buildings"]] == ["hall"]
@@ -0,0 +1,125 @@
+import io
+import pytest
+from PIL import Image
+from backend.database.models.building import Building
+from backend.routes import building as building_routes
+from backend.utils.catalog import CatalogCache, bump_catalog_version
+from backend.utils.sprite_sheet import MAX_SPRITE_TILES, SpriteSheets
+
+
+def _png(width: int, height: int, colour=(30, 90, 200)) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), colour).save(output, format="PNG")
+    return output.getvalue()
+
+
+def test_sheet_packs_thumbnails_in_order():
+    sheets = SpriteSheets(tile_size=32, columns=2)
+    images = {"a": "a.png@1", "b": "b.png@1", "c": "c.png@1"}
+    assert sheets.stale(images) == ["a", "b", "c"]
+    for slug in images:
+        sheets.add_thumbnail(slug, images[slug], _png(64, 32))
+    assert sheets.stale(images) == []
+    assert sheets.stale({**images, "a": "a.png@2"}) == ["a"]
+
+    manifest = sheets.sheet(["c", "a", "b", "unknown"], images)
+    assert manifest["width"] == 64
+    assert list(manifest["tiles"]) == ["c", "a", "b"]
+    assert manifest["tiles"]["c"] == {"x": 0, "y": 0, "w": 32, "h": 16}
+    assert manifest["tiles"]["b"]["x"] == 0 and manifest["tiles"]["b"]["y"] == 32
+    assert Image.open(io.BytesIO(sheets.image(manifest["id"]))).format == "JPEG"
+
+    # Same thumbnails, same name, in any worker
+    other = SpriteSheets(tile_size=32, columns=2)
+    for slug in images:
+        other.add_thumbnail(slug, images[slug], _png(64, 32))
+    assert other.sheet(["c", "a", "b"], images)["id"] == manifest["id"]
+    assert sheets.sheet([], images) == {"id": None, "width": 0, "height": 0, "tiles": {}}
+
+
+def test_sheets_are_evicted_least_recently_used():
+    sheets = SpriteSheets(tile_size=16, max_sheets=2)
+    images = {slug: f"{slug}@1" for slug in "abc"}
+    for slug in images:
+        sheets.add_thumbnail(slug, images[slug], _png(16, 16))
+
+    first, second, third = (sheets.sheet([slug], images)["id"] for slug in "abc")
+    assert sheets.image(first) is None
+    assert sheets.image(second) is not None and sheets.image(third) is not None
+
+
+def test_catalog_cache_is_bounded():
+    cache = CatalogCache(max_entries=2)
+    for key in range(3):
+        cache.get(key, lambda: key)
+    built = []
+    assert cache.get(0, lambda: built.append(0) or "rebuilt") == "rebuilt"
+    assert cache.get(2, lambda: built.append(2)) == 2
+    assert built == [0]
+
+    bump_catalog_version(notify=False)
+    assert cache.get(2, lambda: "new version") == "new version"
+
+
+@pytest.fixture
+def photos(add_building, monkeypatch):
+    monkeypatch.setattr(building_routes, "_sprites", SpriteSheets())
+    add_building("library", image="library.png", image_data=_png(256, 128), mime_type="image/png")
+    add_building("sci", image="sci.png", image_data=_png(128, 128), mime_type="image/png")
+    add_building("hall")
+
+
+def test_sprite_manifest_and_image(client, photos):
+    manifest = client.get("/api/buildings/sprite", params={"slugs": "sci, library,hall,sci"}).json()
+
+    assert list(manifest["tiles"]) == ["sci", "library"]
+    assert manifest["missing"] == ["hall"]
+    assert manifest["tile_size"] == 128
+    assert manifest["url"] == f"/api/buildings/sprite/{manifest['id']}?slugs=sci%2Clibrary%2Chall"
+
+    response = client.get(manifest["url"])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert "immutable" in response.headers["cache-control"]
+    assert Image.open(io.BytesIO(response.content)).size == (manifest["width"], manifest["height"])
+
+    cached = client.get(manifest["url"], headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_sheet_is_rebuilt_by_another_worker(client, photos, monkeypatch):
+    manifest = client.get("/api/buildings/sprite", params={"slugs": "library,sci"}).json()
+    # A worker that never saw the manifest request makes the same sheet from the slugs
+    monkeypatch.setattr(building_routes, "_sprites", SpriteSheets())
+
+    response = client.get(manifest["url"])
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{manifest["id"]}"'
+
+
+def test_changed_images_get_a_new_sheet(client, photos, db, monkeypatch):
+    manifest = client.get("/api/buildings/sprite", params={"slugs": "library,sci"}).json()
+    # Same file name, new bytes, as the re-encode job leaves it
+    db.query(Building).filter(Building.slug == "library").update(
+        {"image_data": _png(64, 64), "version": Building.version + 1}, synchronize_session=False
+    )
+    db.commit()
+    bump_catalog_version(notify=False)
+
+    updated = client.get("/api/buildings/sprite", params={"slugs": "library,sci"}).json()
+    assert updated["id"] != manifest["id"]
+    assert manifest["tiles"]["library"] == {**manifest["tiles"]["library"], "w": 128, "h": 64}
+    assert updated["tiles"]["library"] == {**updated["tiles"]["library"], "w": 64, "h": 64}
+    # A worker without the old sheet cannot make it any more
+    monkeypatch.setattr(building_routes, "_sprites", SpriteSheets())
+    response = client.get(manifest["url"])
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Sprite sheet is out of date"
+
+
+def test_slug_lists_are_checked(client, photos):
+    assert client.get("/api/buildings/sprite", params={"slugs": " , "}).status_code == 400
+    too_many = ",".join(f"b{i}" for i in range(MAX_SPRITE_TILES + 1))
+    assert client.get("/api/buildings/sprite", params={"slugs": too_many}).status_code == 400
+    assert client.get("/api/buildings/sprite", params={"slugs": "hall"}).json()["url"] is None
@@ -0,0 +1,84 @@
+import pytest
+from backend.routes import building as building_routes
+from backend.utils.suggest_index import SuggestIndex
+
+
+def _index():
+    index = SuggestIndex()
+    index.build([
+        ("library", "Main Library", "Library", ["Reading Rooms", "Computer Labs"]),
+        ("eng", "Engineering Block", "School of Engineering", ["Computer Labs", "Workshops"]),
+        ("sci", "Science Block", "School of Science", ["Laboratories"]),
+    ])
+    return index
+
+
+def test_prefixes_match_any_word():
+    index = _index()
+
+    assert index.suggest("lab") == [
+        {"type": "facility", "label": "Computer Labs", "count": 2},
+        {"type": "facility", "label": "Laboratories", "count": 1},
+    ]
+    assert index.suggest("  MAIN  lib") == [{"type": "building", "label": "Main Library", "slug": "library"}]
+    assert [s["label"] for s in index.suggest("block")] == ["Science Block", "Engineering Block"]
+    assert index.suggest("") == []
+    assert len(index.suggest("s", limit=2)) == 2
+
+
+def test_popular_buildings_rank_first():
+    index = _index()
+    index.record_view("eng")
+
+    assert [s["label"] for s in index.suggest("block")] == ["Engineering Block", "Science Block"]
+
+
+def test_incremental_updates():
+    index = _index()
+    index.upsert("sci", "Physics Building", "School of Science", [])
+    assert index.suggest("laborat") == []
+    assert index.suggest("phys") == [{"type": "building", "label": "Physics Building", "slug": "sci"}]
+
+    index.remove("eng")
+    assert index.suggest("workshops") == []
+    assert index.suggest("computer") == [{"type": "facility", "label": "Computer Labs", "count": 1}]
+
+
+@pytest.fixture
+def suggestions(monkeypatch, add_building):
+    # Popularity survives rebuilds, so each test starts from an empty index
+    monkeypatch.setattr(building_routes, "_suggestions", SuggestIndex())
+    monkeypatch.setattr(building_routes, "_suggestions_version", -1)
+    add_building("library", name="Main Library", facilities=["Reading Rooms"])
+    add_building("sci", name="Science Block")
+
+
+def test_suggest_endpoint(client, suggestions):
+    response = client.get("/api/buildings/suggest", params={"prefix": "main"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "prefix": "main",
+        "suggestions": [{"type": "building", "label": "Main Library", "slug": "library"}],
+    }
+    assert client.get("/api/buildings/suggest", params={"prefix": ""}).status_code == 422
+    assert client.get("/api/buildings/suggest", params={"prefix": "a", "limit": 51}).status_code == 422
+
+
+def test_views_rank_existing_buildings_only(client, suggestions):
+    client.get("/api/buildings/suggest", params={"prefix": "s"})
+    for _ in range(3):
+        client.get("/api/sci")
+        client.get("/api/made-up")
+
+    popularity = building_routes._suggestions.popularity
+    assert popularity["sci"] == 3
+    assert "made-up" not in popularity
+
+
+def test_suggestions_follow_catalog_changes(client, suggestions):
+    assert client.get("/api/buildings/suggest", params={"prefix": "hall"}).json()["suggestions"] == []
+
+    client.post("/api/buildings/create", json={"name": "Great Hall", "department": "Arts"})
+    labels = [s["label"] for s in client.get("/api/buildings/suggest", params={"prefix": "hall"}).json()["suggestions"]]
+    assert labels == ["Great Hall"]